@@ -167,6 +167,23 @@ def clean(ctx, config: click.Path, files: List[str]):
     spinner.succeed(f"Completed cleanup")
 
 
+@cli.command()
+@click.argument("taxdump", type=click.Path(exists=True))
+@click.argument("output", type=click.Path())
+@click.pass_context
+def taxindex(ctx, taxdump: click.Path, output: click.Path):
+    """ Build the offline taxonomy index from the NCBI taxdump """
+    from .main.lineage import TAXONOMY_INDEX_ENV
+    from .main.taxonomy import TaxonomyIndex
+
+    spinner = ctx.obj["SPINNER"]
+    spinner.start()
+    spinner.text = f"Building taxonomy index from {taxdump}"
+    TaxonomyIndex.build(taxdump, output)
+    spinner.succeed(f"Built taxonomy index at {output}")
+    click.secho(f"Set {TAXONOMY_INDEX_ENV}={output} to use it")
+
+
 def main():
     cli(obj={})
 
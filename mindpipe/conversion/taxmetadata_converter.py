@@ -4,7 +4,6 @@
 
 import csv
 import pathlib
-from typing import Dict, List
 
 import pandas as pd
 
@@ -25,23 +24,17 @@ def qiime2_to_default(in_file: pathlib.Path, out_file: pathlib.Path) -> None:
     """
     with open(in_file, "r") as fid:
         csv_reader = csv.reader(fid, delimiter="\t")
-        data_dict: Dict[str, List[str]] = {key: [] for key in ObsmetaType._req_keys}
-        data_dict["ID"] = []
         header, *rest = csv_reader
-        ekey = ObsmetaType._extra_key
-        if ekey in header:
-            data_dict[ekey] = []
-        for line in rest:
-            if line[0].startswith("#q2:types"):
-                continue
-            lineage = Lineage.from_str(line[header.index("Taxon")])
-            data_dict["ID"].append(line[0])
-            for rkey in ObsmetaType._req_keys:
-                data_dict[rkey].append(getattr(lineage, rkey))
-            if ekey in data_dict:
-                data_dict[ekey].append(line[header.index(ekey)])
-    df = pd.DataFrame.from_dict(data_dict)
-    df.set_index("ID", inplace=True, verify_integrity=True)
+    rows = [line for line in rest if not line[0].startswith("#q2:types")]
+    ids = [line[0] for line in rows]
+    taxa = pd.Series([line[header.index("Taxon")] for line in rows], index=ids)
+    df = Lineage.from_str_many(taxa)[ObsmetaType._req_keys]
+    df.index.name = "ID"
+    ekey = ObsmetaType._extra_key
+    if ekey in header:
+        df[ekey] = [line[header.index(ekey)] for line in rows]
+    if not df.index.is_unique:
+        raise ValueError("Duplicate IDs in the taxonomy file")
     df.to_csv(out_file, index=True)
 
 
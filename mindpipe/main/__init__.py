@@ -1,4 +1,4 @@
 from .otu import Otu
-from .lineage import Lineage
+from .lineage import Lineage, LineageTree
 from .network import Network
 from .network_group import NetworkGroup
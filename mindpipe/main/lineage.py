@@ -3,18 +3,104 @@
 """
 
 
-from collections import namedtuple
-from typing import Dict, Tuple
+from abc import ABC, abstractmethod
+from collections import namedtuple, OrderedDict
+import os
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
 from warnings import warn
 
-from ete3 import NCBITaxa
+import numpy as np
+import pandas as pd
 
 from ..logging import LOG
 
 
 BaseLineage = namedtuple("Lineage", "Kingdom Phylum Class Order Family Genus Species")
 
-NCBI = NCBITaxa()
+
+class TaxonomyBackend(ABC):
+    """
+        Interface of the taxonomy database used to translate between names and taxids
+
+        Notes
+        -----
+        The methods are a subset of the `ete3.NCBITaxa` interface, which is the default
+        backend. Use `set_taxonomy_backend` to plug in a different implementation
+    """
+
+    @abstractmethod
+    def get_name_translator(self, names: List[str]) -> Dict[str, List[int]]:
+        """ Map each taxonomy name to the list of its taxids """
+
+    @abstractmethod
+    def get_lineage(self, taxid: int) -> List[int]:
+        """ Get the taxids of the lineage of `taxid` from the root """
+
+    @abstractmethod
+    def get_taxid_translator(self, taxids: List[int]) -> Dict[int, str]:
+        """ Map each taxid to its taxonomy name """
+
+    @abstractmethod
+    def get_rank(self, taxids: List[int]) -> Dict[int, str]:
+        """ Map each taxid to its rank """
+
+
+LINEAGE_CACHE_SIZE = 1_000_000
+_LINEAGE_CACHE: Dict[Tuple[type, Tuple[str, ...]], "Lineage"] = dict()
+_RAW_LINEAGE_CACHE: Dict[Tuple[type, Tuple[str, ...]], "Lineage"] = dict()
+
+TAXONOMY_INDEX_ENV = "MINDPIPE_TAXONOMY_INDEX"
+_BACKEND: Optional[TaxonomyBackend] = None
+
+
+def get_taxonomy_backend() -> TaxonomyBackend:
+    """
+        Get the taxonomy backend, creating the default backend on first use
+
+        The default backend is the `TaxonomyIndex` in the folder given by the
+        `MINDPIPE_TAXONOMY_INDEX` environment variable if it is set and
+        `ete3.NCBITaxa` otherwise
+
+        Returns
+        -------
+        TaxonomyBackend
+            The current taxonomy backend
+    """
+    global _BACKEND
+    if _BACKEND is None:
+        index_path = os.environ.get(TAXONOMY_INDEX_ENV)
+        if index_path:
+            from .taxonomy import TaxonomyIndex
+
+            _BACKEND = TaxonomyIndex(index_path)
+        else:
+            # NOTE: ete3 is imported here because importing it takes most of the import time
+            from ete3 import NCBITaxa
+
+            _BACKEND = NCBITaxa()
+    return _BACKEND
+
+
+def set_taxonomy_backend(backend: Optional[TaxonomyBackend]) -> None:
+    """
+        Set the taxonomy backend used by `Lineage`
+
+        Parameters
+        ----------
+        backend : TaxonomyBackend, optional
+            The new backend
+            If None the default backend is created on next use
+    """
+    global _BACKEND
+    _BACKEND = backend
+    _TAXID_CACHE.clear()
+
+
+TAXID_CACHE_SIZE = 100_000
+_TAXID_CACHE: "OrderedDict[Tuple[str, ...], Tuple[str, int, Tuple[str, ...]]]" = (
+    OrderedDict()
+)
 
 
 class Lineage(BaseLineage):
@@ -30,8 +116,15 @@ class Lineage(BaseLineage):
         Family: str
         Genus: str
         Species: str
+
+        Notes
+        -----
+        Instances are interned: constructing a lineage from the same taxonomy names
+        returns the same instance and the names are only normalized once
     """
 
+    __slots__ = ()
+
     def __new__(
         cls,
         Kingdom: str = "",
@@ -42,16 +135,30 @@ class Lineage(BaseLineage):
         Genus: str = "",
         Species: str = "",
     ) -> "Lineage":
-        tax_order = [Kingdom, Phylum, Class, Order, Family, Genus, Species]
+        tax_order = (Kingdom, Phylum, Class, Order, Family, Genus, Species)
+        lineage = _RAW_LINEAGE_CACHE.get((cls, tax_order))
+        if lineage is not None:
+            return lineage
         empty = [i for i, tax in enumerate(tax_order) if tax == ""]
-        if empty and (len(tax_order) - empty[0] != len(empty)):
+        misordered = bool(empty) and (len(tax_order) - empty[0] != len(empty))
+        if misordered:
             warn(
                 RuntimeWarning(
-                    f"Lower levels should not be filled if higher levels are empty: {tax_order}"
+                    f"Lower levels should not be filled if higher levels are empty: {list(tax_order)}"
                 )
             )
-        norm_taxa = [cls._normalize_tax(i) for i in tax_order]
-        return super().__new__(cls, *norm_taxa)
+        norm_taxa = tuple(sys.intern(cls._normalize_tax(i)) for i in tax_order)
+        if max(len(_LINEAGE_CACHE), len(_RAW_LINEAGE_CACHE)) >= LINEAGE_CACHE_SIZE:
+            _LINEAGE_CACHE.clear()
+            _RAW_LINEAGE_CACHE.clear()
+        lineage = _LINEAGE_CACHE.get((cls, norm_taxa))
+        if lineage is None:
+            lineage = super().__new__(cls, *norm_taxa)
+            _LINEAGE_CACHE[(cls, norm_taxa)] = lineage
+        # NOTE: misordered lineages are not cached by their raw names so they always warn
+        if not misordered:
+            _RAW_LINEAGE_CACHE[(cls, tax_order)] = lineage
+        return lineage
 
     @staticmethod
     def _normalize_tax(tax: str) -> str:
@@ -148,6 +255,84 @@ class Lineage(BaseLineage):
         taxa = [l.strip().rsplit("__", 1)[-1] for l in tax_list]
         return cls(*taxa)
 
+    @classmethod
+    def from_str_many(
+        cls, lineage_strs: Iterable[str], style: str = "gg"
+    ) -> pd.DataFrame:
+        """
+            Parse many lineage strings at once into a `DataFrame`
+
+            Parameters
+            ----------
+            lineage_strs : Iterable[str]
+                The lineage strings, usually a `pd.Series` indexed by observation
+            style : {'gg', 'silva'}, optional
+                The style of the lineage strings
+                Default is 'gg'
+
+            Returns
+            -------
+            pd.DataFrame
+                The normalized taxonomy names with one column per `Lineage` field
+                The index is the index of `lineage_strs` if it is a `pd.Series`
+
+            Notes
+            -----
+            The result is identical to calling `from_str` on each string
+            Identical strings are parsed once
+        """
+        strings = pd.Series(lineage_strs, dtype=object)
+        codes, uniques = pd.factorize(strings)
+        if (codes == -1).any():
+            raise ValueError("Incompatible lineage string")
+        unique_strs = pd.Series(uniques, dtype=object).astype(str)
+        if style == "gg":
+            kingdom, phylum = ("k", "p")
+        elif style == "silva":
+            kingdom, phylum = ("D_0", "D_1")
+            unique_strs = unique_strs.str.split(";D_7", n=1).str[0]
+        else:
+            raise ValueError("Style has to be either 'gg' or 'silva'")
+        from_kingdom = unique_strs.str.startswith(kingdom)
+        from_phylum = ~from_kingdom & unique_strs.str.startswith(phylum)
+        if not (from_kingdom | from_phylum).all():
+            raise ValueError("Incompatible lineage string")
+        unique_strs[from_phylum] = "Bacteria;" + unique_strs[from_phylum]
+        levels = unique_strs.str.split(";", expand=True)
+        if levels.shape[1] > len(cls._fields):
+            raise TypeError(
+                f"Lineage strings can have at most {len(cls._fields)} levels"
+            )
+        columns = dict()
+        for ind, field in enumerate(cls._fields):
+            if ind not in levels.columns:
+                columns[field] = pd.Series("", index=levels.index)
+                continue
+            columns[field] = (
+                levels[ind]
+                .str.strip()
+                .str.rsplit("__", n=1)
+                .str[-1]
+                .str.strip()
+                .str.replace("[", "", regex=False)
+                .str.replace("]", "", regex=False)
+                .str.replace("'", "", regex=False)
+                .str.replace("=", "", regex=False)
+                .fillna("")
+            )
+        taxa = pd.DataFrame(columns).astype(str)
+        empty = taxa == ""
+        misordered = (empty.cummax(axis=1) & ~empty).any(axis=1)
+        for tax_order in taxa[misordered].values.tolist():
+            warn(
+                RuntimeWarning(
+                    f"Lower levels should not be filled if higher levels are empty: {tax_order}"
+                )
+            )
+        lineages = taxa.take(codes)
+        lineages.index = strings.index
+        return lineages
+
     def to_str(self, style: str, level: str) -> str:
         """
             Return the string Lineage of the instance in requested 'style'
@@ -223,41 +408,111 @@ class Lineage(BaseLineage):
         tax = self[: ind + 1]
         return Lineage(*tax)
 
-    @property
-    def taxid(self) -> Tuple[str, int]:
+    def _taxid_query(self) -> List[str]:
         """
-            Get the NCBI taxonomy id of the Lineage
+            Get the names that are queried to find the NCBI taxonomy id of the Lineage
 
             Returns
             -------
-            Tuple[str, int]
-                A tuple containing (taxonomy level, NCBI taxonomy id)
+            List[str]
+                The taxonomy names from the highest to the lowest level
         """
         query = list(self)
         # species or subspecies level
         query.append(query[-2] + " " + query[-1].strip())
         # species level
         query[-2] = query[-3] + " " + query[-2].split(" ")[0].strip()
-        taxid_dict = NCBI.get_name_translator(query)
+        return query
+
+    def _pick_taxid(
+        self, query: List[str], taxid_dict: Dict[str, List[int]]
+    ) -> Tuple[str, int, Tuple[str, ...]]:
+        """
+            Pick the taxonomy id of the lowest level of `query` found in `taxid_dict`
+
+            Parameters
+            ----------
+            query : List[str]
+                The names returned by `_taxid_query`
+            taxid_dict : Dict[str, List[int]]
+                The lower case names mapped to their NCBI taxonomy ids
+
+            Returns
+            -------
+            Tuple[str, int, Tuple[str, ...]]
+                The taxonomy level, the NCBI taxonomy id and the warning messages
+        """
         taxid_list = [12908]
         for taxa in reversed(query):
-            if taxa != "" and taxa in taxid_dict:
-                taxid_list = taxid_dict[taxa]
+            if taxa != "" and taxa.lower() in taxid_dict:
+                taxid_list = taxid_dict[taxa.lower()]
                 break
         name = [q for q in reversed(query) if q != ""]
+        warning_msgs = []
         if taxa != name[0] and taxa != name[1]:
-            warning_msg = (
+            warning_msgs.append(
                 f"Lowest level in {self} could not be queried. Using higher level"
             )
-            LOG.logger.warning(warning_msg)
-            warn(RuntimeWarning(warning_msg))
         if len(taxid_list) > 1:
-            warning_msg = f"{self.name} has multiple taxids. Picking the first one"
-            LOG.logger.warning(warning_msg)
-            warn(RuntimeWarning(warning_msg))
-        taxid = taxid_list[0]
+            warning_msgs.append(
+                f"{self.name} has multiple taxids. Picking the first one"
+            )
         rank = self._fields[min(query.index(taxa), len(self._fields) - 1)]
-        return rank, taxid
+        return rank, taxid_list[0], tuple(warning_msgs)
+
+    @classmethod
+    def resolve_taxids(
+        cls, lineages: Iterable["Lineage"]
+    ) -> Dict["Lineage", Tuple[str, int]]:
+        """
+            Get the NCBI taxonomy ids of many lineages with a single database query
+
+            Parameters
+            ----------
+            lineages : Iterable[Lineage]
+                The lineages whose taxonomy ids are required
+
+            Returns
+            -------
+            Dict[Lineage, Tuple[str, int]]
+                The unique lineages mapped to (taxonomy level, NCBI taxonomy id)
+
+            Notes
+            -----
+            Results are kept in a process wide LRU cache of `TAXID_CACHE_SIZE` lineages
+        """
+        unique = list(dict.fromkeys(lineages))
+        missing = [lin for lin in unique if tuple(lin) not in _TAXID_CACHE]
+        if missing:
+            queries = [lin._taxid_query() for lin in missing]
+            names = {taxa for query in queries for taxa in query if taxa != ""}
+            translated = get_taxonomy_backend().get_name_translator(list(names))
+            taxid_dict = {taxa.lower(): taxids for taxa, taxids in translated.items()}
+            for lin, query in zip(missing, queries):
+                _TAXID_CACHE[tuple(lin)] = lin._pick_taxid(query, taxid_dict)
+        taxids = dict()
+        for lin in unique:
+            rank, taxid, warning_msgs = _TAXID_CACHE[tuple(lin)]
+            _TAXID_CACHE.move_to_end(tuple(lin))
+            for warning_msg in warning_msgs:
+                LOG.logger.warning(warning_msg)
+                warn(RuntimeWarning(warning_msg))
+            taxids[lin] = rank, taxid
+        while len(_TAXID_CACHE) > TAXID_CACHE_SIZE:
+            _TAXID_CACHE.popitem(last=False)
+        return taxids
+
+    @property
+    def taxid(self) -> Tuple[str, int]:
+        """
+            Get the NCBI taxonomy id of the Lineage
+
+            Returns
+            -------
+            Tuple[str, int]
+                A tuple containing (taxonomy level, NCBI taxonomy id)
+        """
+        return self.resolve_taxids([self])[self]
 
     @classmethod
     def from_taxid(cls, taxid: int) -> "Lineage":
@@ -274,10 +529,11 @@ class Lineage(BaseLineage):
             "Lineage"
                 Instance of the `Lineage` class
         """
-        lineage_taxids = NCBI.get_lineage(taxid)
-        lineage_names = NCBI.get_taxid_translator(lineage_taxids)
+        backend = get_taxonomy_backend()
+        lineage_taxids = backend.get_lineage(taxid)
+        lineage_names = backend.get_taxid_translator(lineage_taxids)
         lineage_ranks = {
-            v.capitalize(): k for k, v in NCBI.get_rank(lineage_taxids).items()
+            v.capitalize(): k for k, v in backend.get_rank(lineage_taxids).items()
         }
         if "Superkingdom" in lineage_ranks:
             lineage_ranks["Kingdom"] = lineage_ranks["Superkingdom"]
@@ -289,3 +545,193 @@ class Lineage(BaseLineage):
             else:
                 break
         return cls(**taxa)
+
+
+class LineageTree:
+    """
+        Trie over the taxonomy levels of a collection of lineages
+
+        Parameters
+        ----------
+        lineages : Iterable[Lineage]
+            The lineages in the tree
+
+        Attributes
+        ----------
+        lineages : List[Lineage]
+            The lineages in the tree
+        level_nodes : np.ndarray
+            The node of every lineage (rows) at every taxonomy level (columns)
+        leaves : np.ndarray
+            The node of every lineage at the lowest taxonomy level
+
+        Notes
+        -----
+        Node 0 is the root and the other nodes are numbered in pre-order
+        Therefore the descendants of a node are the nodes in [node, end of node)
+        Every lineage has a node at every level, empty taxonomy names included
+    """
+
+    def __init__(self, lineages: Iterable[Lineage]) -> None:
+        self.lineages = list(lineages)
+        n_levels = len(Lineage._fields)
+        names = np.array(
+            [tuple(lineage) for lineage in self.lineages], dtype=object
+        ).reshape(-1, n_levels)
+        # paths[:, i] numbers the unique paths from the root to level i
+        paths = np.zeros((len(self.lineages), n_levels), dtype=np.int64)
+        path = np.zeros(len(self.lineages), dtype=np.int64)
+        for ind in range(n_levels):
+            name_codes, name_uniques = pd.factorize(names[:, ind])
+            path, _ = pd.factorize(path * len(name_uniques) + name_codes)
+            paths[:, ind] = path
+        order = np.lexsort(paths.T[::-1])
+        level_offsets = np.cumsum(np.r_[0, paths.max(axis=0, initial=-1)[:-1] + 1])
+        preorder, _ = pd.factorize((paths[order] + level_offsets).ravel())
+        self.level_nodes = np.empty_like(paths, dtype=np.int32)
+        self.level_nodes[order] = preorder.reshape(paths.shape) + 1
+        n_nodes = self.level_nodes.max(initial=0) + 1
+        self._parent = np.zeros(n_nodes, dtype=np.int32)
+        self._level = np.full(n_nodes, -1, dtype=np.int8)
+        self._name = np.full(n_nodes, "", dtype=object)
+        self._end = np.zeros(n_nodes, dtype=np.int32)
+        self._end[0] = n_nodes
+        self.leaves = self.level_nodes[:, -1]
+        for ind in range(n_levels):
+            nodes = self.level_nodes[:, ind]
+            if ind:
+                self._parent[nodes] = self.level_nodes[:, ind - 1]
+            self._level[nodes] = ind
+            self._name[nodes] = names[:, ind]
+            # NOTE: the last node of a subtree in pre-order is its last leaf
+            np.maximum.at(self._end, nodes, self.leaves + 1)
+        self._leaf_order = np.argsort(self.leaves, kind="stable")
+        self._sorted_leaves = self.leaves[self._leaf_order]
+        self._leaf_map: Dict[Lineage, int] = dict(
+            zip(self.lineages, self.leaves.tolist())
+        )
+
+    def __len__(self) -> int:
+        return len(self._parent)
+
+    @staticmethod
+    def _level_index(level: str) -> int:
+        """ Get the index of the taxonomy level """
+        if level not in Lineage._fields:
+            raise ValueError(f"{level} not a valid field for Lineage")
+        return Lineage._fields.index(level)
+
+    def find(self, lineage: Lineage) -> int:
+        """
+            Get the leaf node of a lineage in the tree
+
+            Parameters
+            ----------
+            lineage : Lineage
+
+            Returns
+            -------
+            int
+        """
+        if lineage not in self._leaf_map:
+            raise KeyError(f"{lineage} is not present in the tree")
+        return self._leaf_map[lineage]
+
+    def get_lineage(self, node: int) -> Lineage:
+        """
+            Get the lineage of a node, the root is the empty lineage
+
+            Parameters
+            ----------
+            node : int
+
+            Returns
+            -------
+            Lineage
+        """
+        taxa = []
+        while node:
+            taxa.append(self._name[node])
+            node = self._parent[node]
+        return Lineage(*taxa[::-1])
+
+    def get_superset(self, node: int, level: str) -> int:
+        """
+            Get the ancestor of a node at the requested level
+
+            Parameters
+            ----------
+            node : int
+            level : str
+                The taxonomy level of the ancestor
+
+            Returns
+            -------
+            int
+        """
+        return int(self.get_supersets(np.array([node]), level)[0])
+
+    def get_supersets(self, nodes: np.ndarray, level: str) -> np.ndarray:
+        """
+            Get the ancestors of many nodes at the requested level
+
+            Parameters
+            ----------
+            nodes : np.ndarray
+            level : str
+                The taxonomy level of the ancestors
+
+            Returns
+            -------
+            np.ndarray
+                The ancestor of every node
+        """
+        ind = self._level_index(level)
+        supersets = np.asarray(nodes, dtype=np.int32)
+        if (self._level[supersets] < ind).any():
+            raise ValueError(f"Nodes must be at or below the {level} level")
+        for _ in range(len(Lineage._fields)):
+            deeper = self._level[supersets] > ind
+            if not deeper.any():
+                break
+            supersets = np.where(deeper, self._parent[supersets], supersets)
+        return supersets
+
+    def common_ancestor(self, node1: int, node2: int) -> int:
+        """
+            Get the lowest common ancestor of two nodes
+
+            Parameters
+            ----------
+            node1 : int
+            node2 : int
+
+            Returns
+            -------
+            int
+                The lowest common ancestor, 0 if the nodes only share the root
+        """
+        while self._level[node1] > self._level[node2]:
+            node1 = self._parent[node1]
+        while self._level[node2] > self._level[node1]:
+            node2 = self._parent[node2]
+        while node1 != node2:
+            node1, node2 = self._parent[node1], self._parent[node2]
+        return int(node1)
+
+    def get_descendants(self, node: int) -> np.ndarray:
+        """
+            Get the lineages that descend from a node
+
+            Parameters
+            ----------
+            node : int
+
+            Returns
+            -------
+            np.ndarray
+                The indices of the descendant lineages in `lineages`
+        """
+        start = np.searchsorted(self._sorted_leaves, node, side="left")
+        end = np.searchsorted(self._sorted_leaves, self._end[node], side="left")
+        return np.sort(self._leaf_order[start:end])
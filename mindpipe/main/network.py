@@ -2,14 +2,13 @@
     Module that defines the `Network` object and methods to read, write and manipulate it
 """
 
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
 from warnings import warn
 
 import networkx as nx
 import numpy as np
 import pandas as pd
 import simplejson
-from statsmodels.stats.multitest import multipletests
 
 from . import Lineage
 from ..validation import (
@@ -21,6 +20,8 @@ from ..validation import (
     ChildrenmapType,
     NodesModel,
     LinksModel,
+    NodetableType,
+    LinkarraysType,
     NetworkmetadataModel,
     ElistType,
 )
@@ -29,6 +30,29 @@ from ..validation import (
 DType = List[Dict[str, Any]]
 LinkDType = Tuple[str, str, Dict[str, float]]
 
+NODE_COLUMNS = ["id", "lineage", "name", "taxid", "taxlevel", "abundance", "children"]
+PCORR_METHODS = [
+    "bonferroni",
+    "sidak",
+    "holm-sidak",
+    "holm",
+    "simes-hochberg",
+    "hommel",
+    "fdr_bh",
+    "fdr_by",
+    "fdr_tsbh",
+    "fdr_tsbky",
+]
+
+
+class LinkArrays(NamedTuple):
+    """ The columnar representation of the links of a network """
+
+    source: np.ndarray
+    target: np.ndarray
+    weight: np.ndarray
+    pvalue: np.ndarray
+
 
 class Network:
     """
@@ -38,9 +62,10 @@ class Network:
         ----------
         nodes : List[str]
             The list of nodes in the network
-        links : List[LinkDType]
+        links : Union[List[LinkDType], LinkArrays]
             The list of links in the network
             Each link is a dict and must contain: 'source', 'target', 'weight', 'pvalue' as keys
+            The links can also be given as `LinkArrays` of node indices into `nodes`
         metadata : dict
             The metadata for the whole network (general and experiment)
             Must contain 'host', 'condition', 'location', 'experimental_metadata', 'pubmed_id',
@@ -76,6 +101,7 @@ class Network:
         ----------
         graph : Union[nx.MultiGraph, nx.MultiDiGraph]
             The networkx multi-graph representation of the network
+            It is built from the node table and link arrays on first access
         simple_graph : Union[nx.Graph, nx.DiGraph]
             The networkx simple-graph representation of the network
         nodes : DType
@@ -93,7 +119,7 @@ class Network:
     def __init__(
         self,
         nodes: List[str],
-        links: List[LinkDType],
+        links: Union[List[LinkDType], LinkArrays],
         metadata: dict,
         cmetadata: dict,
         obs_metadata: pd.DataFrame,
@@ -113,46 +139,41 @@ class Network:
         if children_map:
             children_validator = ChildrenmapType()
             children_validator.validate(children_map)
-        pvalues = np.array([link[2]["pvalue"] for link in links])
+        if not isinstance(links, LinkArrays):
+            links = self._links_to_arrays(nodes, links)
         if pvalue_correction:
             corrected_pvalues = self._correct_pvalues(
-                pvalues, pvalue_correction, pvalue_threshold
-            )
-        else:
-            corrected_pvalues = pvalues
-        corrected_links: List[LinkDType] = []
-        for i, link in enumerate(links):
-            source, target = link[0], link[1]
-            corrected_links.append(
-                (source, target, {**link[2], "pvalue": corrected_pvalues[i]})
+                links.pvalue, pvalue_correction, pvalue_threshold
             )
+            links = links._replace(pvalue=corrected_pvalues)
         if "pvalue_threshold" not in cmetadata:
             cmetadata["pvalue_threshold"] = pvalue_threshold
         if "pvalue_correction" not in cmetadata:
             cmetadata["pvalue_correction"] = pvalue_correction
         if "interaction_threshold" not in cmetadata:
             cmetadata["interaction_threshold"] = interaction_threshold
-        self.graph = self._create_graph(
-            nodes,
-            corrected_links,
-            metadata,
-            cmetadata,
-            obs_metadata,
-            children_map,
-            interaction_type,
-            directed,
+        self._metadata = {
+            **metadata,
+            "computational_metadata": cmetadata,
+            "interaction_type": interaction_type,
+            "directionality": "directed" if directed else "undirected",
+        }
+        self._nodes, self._links = self._create_tables(
+            nodes, links, obs_metadata, children_map
         )
-        # TODO: option to set validate=True
-        nodes_model = NodesModel({"nodes": self.nodes}, strict=False)
-        nodes_model.validate()
-        links_model = LinksModel({"links": self.links}, strict=False)
-        links_model.validate()
+        self._link_order = self._edge_order(self._links, directed)
+        self._graph: Optional[Union[nx.MultiGraph, nx.MultiDiGraph]] = None
+        # NOTE: the tables are validated column-wise without creating a record per link
+        nodetable_validator = NodetableType()
+        nodetable_validator.validate(self._nodes)
+        linkarrays_validator = LinkarraysType(n_nodes=len(self._nodes))
+        linkarrays_validator.validate(self._links)
         networkmetadata_model = NetworkmetadataModel(self.metadata, strict=False)
         networkmetadata_model.validate()
 
     def __repr__(self) -> str:
-        n_nodes = len(self.nodes)
-        n_links = len(self.links)
+        n_nodes = len(self._nodes)
+        n_links = len(self._links.source)
         directionality = self.metadata["directionality"]
         interaction_type = self.metadata["interaction_type"]
         string = (
@@ -180,27 +201,46 @@ class Network:
                 "Interaction and pvalue matrices do not have matching indices"
             )
 
+    @staticmethod
+    def _links_to_arrays(nodes: List[str], links: List[LinkDType]) -> LinkArrays:
+        """
+            Convert a list of links to their columnar representation
+
+            Parameters
+            ----------
+            nodes : List[str]
+                The list of nodes in the network
+            links : List[LinkDType]
+                The list of links in the network
+
+            Returns
+            -------
+            LinkArrays
+                The links with the source and target as indices into `nodes`
+        """
+        node_inds = {node: ind for ind, node in enumerate(nodes)}
+        try:
+            source = [node_inds[link[0]] for link in links]
+            target = [node_inds[link[1]] for link in links]
+        except KeyError as err:
+            raise ValueError(f"Link node {err} is not one of the nodes of the network")
+        return LinkArrays(
+            source=np.array(source, dtype=np.int32),
+            target=np.array(target, dtype=np.int32),
+            weight=np.array([link[2]["weight"] for link in links], dtype=float),
+            pvalue=np.array([link[2]["pvalue"] for link in links], dtype=float),
+        )
+
     @property
     def pcorr_methods(self) -> List[str]:
         """
             Returns list supported pvalue correction methods
         """
-        methods = [
-            "bonferroni",
-            "sidak",
-            "holm-sidak",
-            "holm",
-            "simes-hochberg",
-            "hommel",
-            "fdr_bh",
-            "fdr_by",
-            "fdr_tsbh",
-            "fdr_tsbky",
-        ]
-        return methods
+        return PCORR_METHODS
 
+    @staticmethod
     def _correct_pvalues(
-        self, pvalues: np.array, method: str, pvalue_threshold: float
+        pvalues: np.array, method: str, pvalue_threshold: float
     ) -> pd.DataFrame:
         """
             Correct pvalues using 'method'
@@ -220,67 +260,52 @@ class Network:
             pd.DataFrame
                 DataFrame containing corrected pvalues
         """
-        if method not in self.pcorr_methods:
+        if method not in PCORR_METHODS:
             raise ValueError(
-                f"Method {method} not supported. Must be one of {self.pcorr_methods}"
+                f"Method {method} not supported. Must be one of {PCORR_METHODS}"
             )
+        # NOTE: statsmodels is imported here because it is slow to import
+        from statsmodels.stats.multitest import multipletests
+
         _, pvals_correct, *_ = multipletests(
             pvalues, alpha=pvalue_threshold, method=method
         )
         return pvals_correct
 
     @staticmethod
-    def _create_graph(
+    def _create_tables(
         nodes: List[str],
-        links: List[LinkDType],
-        emetadata: dict,
-        cmetadata: dict,
+        links: LinkArrays,
         obs_metadata: pd.DataFrame,
         children_map: Optional[dict],
-        interaction_type: str,
-        directed: bool,
-    ) -> Union[nx.MultiGraph, nx.MultiDiGraph]:
+    ) -> Tuple[pd.DataFrame, LinkArrays]:
         """
-            Create network from interaction matrix, pvalue matrix, metadata dictionary,
-            lineage table and children mapping
+            Create the node table and the link arrays of the network from the nodes,
+            links, lineage table and children mapping
 
             Parameters
             ----------
             nodes : List[str]
                 The list of nodes in the network
-            links : List[LinkDType]
-                The list of links in the network
-            emetadata : dict
-                The dictionary of general and experimental metadata
-            cmetadata : dict
-                The dictionary of computational metadata
+            links : LinkArrays
+                The links in the network
             obs_metadata : pd.DataFrame
                 The `DataFrame` containing taxonomy information for the nodes of the network
             children_map : dict
                 The dictionary that contains the mapping {obs_id => [children]}
-            interaction_type : str
-                The type of interaction encoded by the edges of the network
-            directed : bool
-                Flag to determine whether the network is directed or not
 
             Returns
             -------
-            Union[nx.MultiGraph, nx.MultiDiGraph]
-                The networkx graph of the network
+            Tuple[pd.DataFrame, LinkArrays]
+                The node table indexed by node id and the links between its rows
         """
-        directionality = "directed" if directed else "undirected"
-        metadata = {
-            **emetadata,
-            "computational_metadata": cmetadata,
-            "interaction_type": interaction_type,
-            "directionality": directionality,
-        }
-        if directed:
-            graph = nx.MultiDiGraph(**metadata)
-        else:
-            graph = nx.MultiGraph(**metadata)
+        node_ids = np.empty(len(nodes), dtype=object)
+        node_ids[:] = nodes
+        # NOTE: repeated nodes are merged like networkx does
+        node_codes, unique_nodes = pd.factorize(node_ids)
         abundance_flag = "Abundance" in obs_metadata.columns
-        for node in nodes:
+        node_data = []
+        for node in unique_nodes:
             if abundance_flag:
                 lineage = Lineage(**obs_metadata.drop("Abundance").loc[node].to_dict())
                 abundance = obs_metadata.loc[node].Abundance
@@ -299,47 +324,132 @@ class Network:
                 children = children_map.get(node, [])
             else:
                 children = []
-            sup_lineage = lineage.get_superset(lineage.taxid[0])
-            graph.add_node(
-                node,
-                id=node,
-                lineage=sup_lineage.to_str(style="gg", level=sup_lineage.name[0]),
-                name=sup_lineage.name[1],
-                taxid=sup_lineage.taxid[1],
-                taxlevel=sup_lineage.name[0],
-                abundance=abundance,
-                children=children,
+            node_data.append((node, lineage, abundance, children))
+        # NOTE: taxids of all the nodes are resolved in one query per batch
+        taxids = Lineage.resolve_taxids(lineage for _, lineage, *_ in node_data)
+        sup_lineages = {
+            lineage: lineage.get_superset(taxids[lineage][0]) for lineage in taxids
+        }
+        sup_taxids = Lineage.resolve_taxids(sup_lineages.values())
+        node_records = []
+        for node, lineage, abundance, children in node_data:
+            sup_lineage = sup_lineages[lineage]
+            node_records.append(
+                {
+                    "id": node,
+                    "lineage": sup_lineage.to_str(
+                        style="gg", level=sup_lineage.name[0]
+                    ),
+                    "name": sup_lineage.name[1],
+                    "taxid": sup_taxids[sup_lineage][1],
+                    "taxlevel": sup_lineage.name[0],
+                    "abundance": abundance,
+                    "children": children,
+                }
             )
-        for link in links:
-            source, target = link[0], link[1]
-            # NOTE: Self-loops are not allowed
-            if source == target:
-                continue
-            weight, pvalue = link[2]["weight"], link[2]["pvalue"]
-            graph.add_edge(
-                source,
-                target,
-                source=source,
-                target=target,
-                weight=weight,
-                pvalue=pvalue,
+        node_table = pd.DataFrame(
+            node_records, index=unique_nodes, columns=NODE_COLUMNS, dtype=object
+        )
+        source, target = node_codes[links.source], node_codes[links.target]
+        # NOTE: Self-loops are not allowed
+        keep = source != target
+        link_table = LinkArrays(
+            source=source[keep].astype(np.int32),
+            target=target[keep].astype(np.int32),
+            weight=links.weight[keep],
+            pvalue=links.pvalue[keep],
+        )
+        return node_table, link_table
+
+    @staticmethod
+    def _edge_order(links: LinkArrays, directed: bool) -> np.ndarray:
+        """
+            Get the order in which networkx lists the links of the network
+
+            Parameters
+            ----------
+            links : LinkArrays
+                The links in the network in the order they were added
+            directed : bool
+                Flag to determine whether the network is directed or not
+
+            Returns
+            -------
+            np.ndarray
+                The indices of the links in the order of `graph.edges()`
+
+            Notes
+            -----
+            networkx lists the links by their first node, then by the order in which the
+            neighbors of that node were first linked to it and then in the order they were added
+        """
+        if directed:
+            first, second = links.source, links.target
+        else:
+            first = np.minimum(links.source, links.target)
+            second = np.maximum(links.source, links.target)
+        n_nodes = max(first.max(initial=0), second.max(initial=0)) + 1
+        pair_codes, _ = pd.factorize(
+            first.astype(np.int64) * n_nodes + second.astype(np.int64)
+        )
+        return np.lexsort((np.arange(len(first)), pair_codes, first))
+
+    def _link_records(self, inds: np.ndarray) -> DType:
+        """
+            Get the links at `inds` as a list of dicts
+
+            Parameters
+            ----------
+            inds : np.ndarray
+                The indices of the links
+
+            Returns
+            -------
+            DType
+                The links and their corresponding properties
+        """
+        node_ids = self._nodes.index.values
+        return [
+            {"source": source, "target": target, "weight": weight, "pvalue": pvalue}
+            for source, target, weight, pvalue in zip(
+                node_ids[self._links.source[inds]].tolist(),
+                node_ids[self._links.target[inds]].tolist(),
+                self._links.weight[inds],
+                self._links.pvalue[inds],
             )
-        return graph
+        ]
+
+    @property
+    def graph(self) -> Union[nx.MultiGraph, nx.MultiDiGraph]:
+        """ The networkx multi-graph representation of the network """
+        if self._graph is None:
+            if self.metadata["directionality"] == "directed":
+                graph = nx.MultiDiGraph()
+            else:
+                graph = nx.MultiGraph()
+            # NOTE: the graph shares the metadata dict of the network
+            graph.graph = self._metadata
+            for node, data in zip(self._nodes.index, self.nodes):
+                graph.add_node(node, **data)
+            for link in self._link_records(np.arange(len(self._links.source))):
+                graph.add_edge(link["source"], link["target"], **link)
+            self._graph = graph
+        return self._graph
 
     @property
     def nodes(self) -> DType:
         """ The list of nodes in the network and their corresponding properties """
-        return [data for _, data in self.graph.nodes(data=True)]
+        return self._nodes.to_dict("records")
 
     @property
     def links(self) -> DType:
         """ The list of links in the network and their corresponding properties """
-        return [data for _, _, data in self.graph.edges(data=True)]
+        return self._link_records(self._link_order)
 
     @property
     def metadata(self) -> Dict[str, Any]:
         """ The metadata for the network """
-        return self.graph.graph
+        return self._metadata
 
     @property
     def simple_graph(self) -> Union[nx.Graph, nx.DiGraph]:
@@ -374,19 +484,12 @@ class Network:
             DType
                 The list of links in the network after applying thresholds
         """
-        interaction_threshold = abs(self.interaction_threshold)
-        interaction_func = lambda x: abs(x["weight"]) >= interaction_threshold
-        pvalue_func = lambda x: x["pvalue"] <= self.pvalue_threshold
-        if pvalue_filter and interaction_filter:
-            filter_func = lambda x: interaction_func(x) and pvalue_func(x)
-        elif interaction_filter:
-            filter_func = interaction_func
-        elif pvalue_filter:
-            filter_func = pvalue_func
-        else:
-            return self.links
-        links_thres = list(filter(filter_func, self.links))
-        return links_thres
+        keep = np.ones(len(self._links.source), dtype=bool)
+        if interaction_filter:
+            keep &= np.abs(self._links.weight) >= abs(self.interaction_threshold)
+        if pvalue_filter:
+            keep &= self._links.pvalue <= self.pvalue_threshold
+        return self._link_records(self._link_order[keep[self._link_order]])
 
     @classmethod
     def load_data(
@@ -402,6 +505,7 @@ class Network:
         pvalue_threshold: float = 0.05,
         pvalue_correction: Optional[str] = "fdr_bh",
         directed: bool = False,
+        prefilter: bool = True,
     ) -> "Network":
         """
             Create a `Network` object from files (interaction tables and other metadata)
@@ -439,6 +543,12 @@ class Network:
             directed : bool
                 True if network is directed
                 Default value is False
+            prefilter : bool
+                If True the links below `interaction_threshold` (absolute value) are dropped
+                before the network is created
+                The pvalues are corrected before dropping the links
+                Set to False to keep every link of the interaction matrix
+                Default value is True
 
             Returns
             -------
@@ -460,26 +570,34 @@ class Network:
             pvalue_validator.validate(pvalues)
         else:
             pvalues = None
-        # If undirected convert to upper triangular matrix
+        # If undirected only use the upper triangular matrix
+        interaction_mat = interactions.values
         if directed:
-            interaction_mat = interactions.values
+            row_inds, col_inds = np.nonzero(interaction_mat)
         else:
-            interaction_mat = np.triu(interactions.values)
-        row_inds, col_inds = interaction_mat.nonzero()
+            row_inds, col_inds = np.nonzero(np.triu(interaction_mat))
         # Calculate nodes and links
+        # NOTE: the validators ensure that the columns are the same as the index
         nodes = list(interactions.index)
-        links: List[LinkDType] = []
-        for rind, cind in zip(row_inds, col_inds):
-            links.append(
-                (
-                    interactions.index[rind],
-                    interactions.columns[cind],
-                    {
-                        "weight": interactions.iloc[rind, cind],
-                        "pvalue": pvalues.iloc[rind, cind] if pvalue_file else np.nan,
-                    },
-                )
+        weights = interaction_mat[row_inds, col_inds].astype(float)
+        if pvalues is not None:
+            link_pvalues = pvalues.values[row_inds, col_inds].astype(float)
+        else:
+            link_pvalues = np.full(len(weights), np.nan)
+        # NOTE: the pvalues are corrected before prefiltering so that all the links are counted
+        if prefilter and pvalue_correction:
+            link_pvalues = cls._correct_pvalues(
+                link_pvalues, pvalue_correction, pvalue_threshold
             )
+        links = LinkArrays(
+            source=row_inds.astype(np.int32),
+            target=col_inds.astype(np.int32),
+            weight=weights,
+            pvalue=link_pvalues,
+        )
+        if prefilter:
+            keep = np.abs(links.weight) >= abs(interaction_threshold)
+            links = LinkArrays(*(column[keep] for column in links))
         # Load metadata
         with open(meta_file, "r") as fid:
             metadata = simplejson.load(fid)
@@ -494,6 +612,7 @@ class Network:
         else:
             extra_compdata = {"interaction_threshold": interaction_threshold}
         cmetadata = {**cmetadata, **extra_compdata}
+        cmetadata.setdefault("pvalue_correction", pvalue_correction)
         obs_metadata = pd.read_csv(obsmeta_file, index_col=0, na_filter=False)
         if children_file is not None:
             with open(children_file, "r") as fid:
@@ -510,7 +629,7 @@ class Network:
             interaction_type,
             interaction_threshold,
             pvalue_threshold,
-            pvalue_correction,
+            None if prefilter else pvalue_correction,
             directed,
         )
         return network
@@ -6,6 +6,7 @@ from collections.abc import Collection
 from typing import Any, Dict, Iterator, List, Union
 
 import networkx as nx
+import numpy as np
 import simplejson
 
 from .network import Network
@@ -136,7 +137,7 @@ class NetworkGroup(Collection):
             contexts.append(network.metadata)
         merged_nodes = self._combine_nodes(nodes_dict)
         merged_links = self._combine_links(links_dict)
-        if all([n.graph.is_directed() for n in networks]):
+        if all([n.metadata["directionality"] == "directed" for n in networks]):
             graph = nx.MultiDiGraph(contexts=contexts)
         else:
             graph = nx.MultiGraph(contexts=contexts)
@@ -2,21 +2,396 @@
     Module that defines the `Otu` objects and methods to manipulate it
 """
 
-import json
+from concurrent.futures import ProcessPoolExecutor
+import gzip
 import pathlib
-from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+)
 
 from biom import Table
 from biom.util import biom_open
 import numpy as np
 import pandas as pd
+from scipy import sparse
+import simplejson
 
 from ..validation import OtuValidator, BiomType, SamplemetaType, ObsmetaType
-from .lineage import Lineage
+from .lineage import Lineage, LineageTree
 
 
 Filterfun = Callable[[np.ndarray, str, dict], bool]
 Hashfun = Callable[[str, dict], Hashable]
+AxisLabels = Tuple[np.ndarray, Optional[list]]
+
+RAREFY_BLOCK_SIZE = 1000
+CSS_QUANTILE = 0.5
+CSS_SCALE = 1000
+NPZ_VERSION = 3
+
+# The counts matrix and the labels of the shared axis of the partitions of a worker
+_PARTITION_WORKER: Dict[str, Any] = dict()
+
+
+def _rarefy_columns(
+    indptr: np.ndarray, counts: np.ndarray, depth: int, seed: np.random.SeedSequence
+) -> np.ndarray:
+    """
+        Subsample every column of a block of a CSC matrix to `depth` reads
+
+        Parameters
+        ----------
+        indptr : np.ndarray
+            The column pointers of the block (relative to `counts`)
+        counts : np.ndarray
+            The integer nonzero counts of the block
+        depth : int
+            The number of reads drawn without replacement from every column
+        seed : np.random.SeedSequence
+            The seed for the random generator of the block
+
+        Returns
+        -------
+        np.ndarray
+            The subsampled counts with the same sparsity structure as `counts`
+    """
+    rng = np.random.default_rng(seed)
+    rarefied = np.empty_like(counts)
+    for start, end in zip(indptr[:-1], indptr[1:]):
+        rarefied[start:end] = rng.multivariate_hypergeometric(
+            counts[start:end], depth, method="marginals"
+        )
+    return rarefied
+
+
+def _slice_table(
+    matrix: sparse.spmatrix,
+    inds: np.ndarray,
+    axis: str,
+    obs_ids: np.ndarray,
+    sample_ids: np.ndarray,
+    obs_metadata: Optional[list],
+    sample_metadata: Optional[list],
+    table_type: Optional[str],
+) -> Table:
+    """
+        Slice `matrix` along `axis` and wrap the result in a `biom.Table`
+
+        Parameters
+        ----------
+        matrix : sparse.spmatrix
+            The counts matrix of the original table
+        inds : np.ndarray
+            The integer positions of the samples or observations to keep
+        axis : {'sample', 'observation'}
+            The axis along which to slice the matrix
+        obs_ids, sample_ids : np.ndarray
+            The ids of the sliced table
+        obs_metadata, sample_metadata : list, optional
+            The metadata of the sliced table
+        table_type : str, optional
+            The type of the table
+
+        Returns
+        -------
+        Table
+            The sliced `biom.Table`
+    """
+    if axis == "sample":
+        sliced = matrix.tocsc()[:, inds]
+    else:
+        sliced = matrix.tocsr()[inds]
+    return Table(
+        sliced,
+        obs_ids,
+        sample_ids,
+        observation_metadata=obs_metadata,
+        sample_metadata=sample_metadata,
+        type=table_type,
+    )
+
+
+def _order_labels(
+    axis: str, labels: AxisLabels, shared_labels: AxisLabels
+) -> Tuple[np.ndarray, np.ndarray, Optional[list], Optional[list]]:
+    """
+        Order the labels of the sliced axis and of the shared axis as table arguments
+
+        Parameters
+        ----------
+        axis : {'sample', 'observation'}
+            The axis along which the table is sliced
+        labels : Tuple[np.ndarray, list]
+            The ids and metadata of the sliced axis
+        shared_labels : Tuple[np.ndarray, list]
+            The ids and metadata of the other axis
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray, list, list]
+            The observation ids, sample ids, observation metadata and sample metadata
+    """
+    if axis == "sample":
+        (sample_ids, sample_metadata), (obs_ids, obs_metadata) = labels, shared_labels
+    else:
+        (obs_ids, obs_metadata), (sample_ids, sample_metadata) = labels, shared_labels
+    return obs_ids, sample_ids, obs_metadata, sample_metadata
+
+
+def _share_array(array: np.ndarray) -> Tuple[Any, Tuple[str, tuple, str]]:
+    """
+        Copy `array` into a new shared memory block
+
+        Returns
+        -------
+        Tuple[SharedMemory, Tuple[str, tuple, str]]
+            The shared memory block and the (name, shape, dtype) needed to attach to it
+    """
+    from multiprocessing.shared_memory import SharedMemory
+
+    shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def _init_partition_worker(
+    matrix_spec: Dict[str, Any], shared_labels: AxisLabels
+) -> None:
+    """
+        Store the data that is common to all the partitions once per worker process
+
+        Parameters
+        ----------
+        matrix_spec : Dict[str, Any]
+            The shared memory description of the CSC/CSR matrix of the original table
+        shared_labels : Tuple[np.ndarray, list]
+            The ids and metadata of the axis that is not partitioned
+    """
+    _PARTITION_WORKER["matrix_spec"] = matrix_spec
+    _PARTITION_WORKER["shared_labels"] = shared_labels
+
+
+def _apply_partition(
+    partition_spec: Dict[str, Any], apply_func: Callable[[Hashable, "Otu"], Any]
+) -> Any:
+    """
+        Build a partition from the shared counts matrix and apply `apply_func` to it
+
+        Parameters
+        ----------
+        partition_spec : Dict[str, Any]
+            The label, axis, indices, ids and metadata of the partition
+        apply_func : Callable[[Hashable, Otu], Any]
+            The function that takes in (label, Otu) and returns the result
+
+        Returns
+        -------
+        Any
+            The result of `apply_func`
+
+        Notes
+        -----
+        The worker must have been initialized with `_init_partition_worker`
+    """
+    from multiprocessing.shared_memory import SharedMemory
+
+    matrix_spec = _PARTITION_WORKER["matrix_spec"]
+    shms = [SharedMemory(name=name) for name, *_ in matrix_spec["arrays"]]
+    try:
+        arrays = [
+            np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            for shm, (_, shape, dtype) in zip(shms, matrix_spec["arrays"])
+        ]
+        if partition_spec["axis"] == "sample":
+            matrix = sparse.csc_matrix(tuple(arrays), shape=matrix_spec["shape"])
+        else:
+            matrix = sparse.csr_matrix(tuple(arrays), shape=matrix_spec["shape"])
+        labels = _order_labels(
+            partition_spec["axis"],
+            partition_spec["labels"],
+            _PARTITION_WORKER["shared_labels"],
+        )
+        table = _slice_table(
+            matrix,
+            partition_spec["inds"],
+            partition_spec["axis"],
+            *labels,
+            matrix_spec["type"],
+        )
+        del arrays, matrix
+    finally:
+        for shm in shms:
+            shm.close()
+    otu = Otu._from_table(table, matrix_spec["validation_level"])
+    return apply_func(partition_spec["label"], otu)
+
+
+def _json_default(value: Any) -> Any:
+    """ Convert the numpy scalars of the metadata to their python equivalent """
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} values can not be encoded")
+
+
+def _metadata_arrays(metadata: Optional[tuple], prefix: str) -> Dict[str, np.ndarray]:
+    """
+        Encode the `biom.Table` metadata of one axis as column arrays
+
+        Parameters
+        ----------
+        metadata : tuple, optional
+            The metadata dictionaries of the samples or observations
+        prefix : str
+            The prefix of the array names
+
+        Returns
+        -------
+        Dict[str, np.ndarray]
+            The column names, the values of every column and the mask of the rows
+            that have every column
+
+        Notes
+        -----
+        Columns whose values all have the same numeric or string type are stored as
+        native arrays, every other column is stored as `JSON` encoded values
+    """
+    if metadata is None:
+        return dict()
+    records = [dict(md) for md in metadata]
+    columns = list(dict.fromkeys(key for md in records for key in md))
+    arrays = {f"{prefix}_columns": np.array(columns, dtype=str)}
+    for i, column in enumerate(columns):
+        present = np.array([column in md for md in records], dtype=bool)
+        values = [md.get(column) for md in records]
+        kinds = {type(value) for value in values}
+        if (
+            present.all()
+            and len(kinds) == 1
+            and issubclass(kinds.pop(), (int, float, str, np.number, np.bool_))
+        ):
+            arrays[f"{prefix}_{i}"] = np.array(values)
+            continue
+        try:
+            encoded = [
+                simplejson.dumps(value, default=_json_default) for value in values
+            ]
+        except TypeError as err:
+            raise ValueError(f"Metadata column {column} can not be cached: {err}")
+        arrays[f"{prefix}_{i}_json"] = np.array(encoded, dtype=str)
+        if not present.all():
+            arrays[f"{prefix}_{i}_present"] = present
+    return arrays
+
+
+def _metadata_from_arrays(
+    arrays: Dict[str, np.ndarray], prefix: str, size: int
+) -> Optional[List[dict]]:
+    """
+        Decode the column arrays written by `_metadata_arrays`
+
+        Parameters
+        ----------
+        arrays : Dict[str, np.ndarray]
+            The arrays read from the cache file
+        prefix : str
+            The prefix of the array names
+        size : int
+            The number of samples or observations
+
+        Returns
+        -------
+        List[dict], optional
+            The metadata dictionaries of the samples or observations
+    """
+    if f"{prefix}_columns" not in arrays:
+        return None
+    records: List[dict] = [dict() for _ in range(size)]
+    for i, column in enumerate(arrays[f"{prefix}_columns"].tolist()):
+        if f"{prefix}_{i}" in arrays:
+            values = arrays[f"{prefix}_{i}"].tolist()
+        else:
+            values = [simplejson.loads(value) for value in arrays[f"{prefix}_{i}_json"]]
+        present = arrays.get(f"{prefix}_{i}_present", np.ones(size, dtype=bool))
+        for md, value, has_column in zip(records, values, present):
+            if has_column:
+                md[column] = value
+    return records
+
+
+def _write_npz(table: Table, fpath: pathlib.Path, validation_level: str) -> None:
+    """
+        Write a `biom.Table` to the uncompressed `npz` cache format
+
+        Parameters
+        ----------
+        table : Table
+            The table to be written
+        fpath : pathlib.Path
+            The path of the `npz` file
+        validation_level : {'full', 'structural', 'none'}
+            The level of `BiomType` validation that the table has passed
+    """
+    matrix = table.matrix_data.tocsr()
+    np.savez(
+        fpath,
+        version=np.array(NPZ_VERSION),
+        validation_level=np.array(validation_level),
+        table_type=np.array(table.type or ""),
+        shape=np.array(matrix.shape),
+        data=matrix.data,
+        indices=matrix.indices,
+        indptr=matrix.indptr,
+        obs_ids=np.array(table.ids(axis="observation"), dtype=str),
+        sample_ids=np.array(table.ids(axis="sample"), dtype=str),
+        **_metadata_arrays(table.metadata(axis="observation"), "obs_metadata"),
+        **_metadata_arrays(table.metadata(axis="sample"), "sample_metadata"),
+    )
+
+
+def _read_npz(fpath: pathlib.Path) -> Tuple[Table, str]:
+    """
+        Read a `biom.Table` from the `npz` cache format
+
+        Parameters
+        ----------
+        fpath : pathlib.Path
+            The path of the `npz` file
+
+        Returns
+        -------
+        Tuple[Table, str]
+            The table and the level of validation it passed before it was written
+    """
+    with np.load(fpath, allow_pickle=False) as npz:
+        arrays = dict(npz.items())
+    if int(arrays.get("version", -1)) != NPZ_VERSION:
+        raise ValueError(f"{fpath} is not a supported mindpipe npz file")
+    matrix = sparse.csr_matrix(
+        (arrays["data"], arrays["indices"], arrays["indptr"]),
+        shape=tuple(arrays["shape"]),
+    )
+    obs_ids, sample_ids = arrays["obs_ids"], arrays["sample_ids"]
+    table = Table(
+        matrix,
+        obs_ids,
+        sample_ids,
+        observation_metadata=_metadata_from_arrays(
+            arrays, "obs_metadata", len(obs_ids)
+        ),
+        sample_metadata=_metadata_from_arrays(
+            arrays, "sample_metadata", len(sample_ids)
+        ),
+        type=str(arrays["table_type"]) or None,
+    )
+    return table, str(arrays["validation_level"])
 
 
 class Otu:
@@ -31,6 +406,14 @@ class Otu:
             `pd.DataFrame` containing metadata for the samples
         obs_metadata : pd.DataFrame,  optional
             `pd.DataFrame` containing metadata for the observations (OTUs)
+        copy : bool, optional
+            If False the instance takes ownership of `otu_data` instead of copying it
+            Default value is True
+        validation_level : {'full', 'structural', 'none'}, optional
+            The level of `BiomType` validation applied to `otu_data`
+            'structural' only checks the type, the sample ids and the observation ids
+            'none' skips validation, only use this for trusted tables
+            Default value is 'full'
 
         Attributes
         ----------
@@ -42,10 +425,18 @@ class Otu:
             Lineage data for the observations (OTUs)
         tax_level : str
             The taxonomy level of the current Otu instance
+        validation_timings : Dict[str, float]
+            The time in seconds taken by each validation check of the table
+        validation_level : str
+            The level of `BiomType` validation that the table has passed
 
         Notes
         -----
         All methods that manipulate the Otu object return new objects
+        The tables created by these methods are handed over to the new objects
+        without being copied or validated again
+        The metadata and normalization properties are cached until `otu_data` is
+        replaced, so the table must not be modified in place
     """
 
     def __init__(
@@ -53,10 +444,12 @@ class Otu:
         otu_data: Table,
         sample_metadata: Optional[pd.DataFrame] = None,
         obs_metadata: Optional[pd.DataFrame] = None,
+        copy: bool = True,
+        validation_level: str = "full",
     ) -> None:
         if not isinstance(otu_data, Table):
             raise TypeError("Otu data must be of type `biom.Table`")
-        otu_data_copy = otu_data.copy()
+        otu_data_copy = otu_data.copy() if copy else otu_data
         if sample_metadata:
             samplemeta_type = SamplemetaType()
             samplemeta_type.validate(sample_metadata)
@@ -69,9 +462,150 @@ class Otu:
             otu_data_copy.add_metadata(
                 obs_metadata.to_dict(orient="index"), axis="observation"
             )
-        biom_type = BiomType()
+        biom_type = BiomType(level=validation_level)
         biom_type.validate(otu_data_copy)
+        self._norm_cache: Dict[str, bool] = dict()
+        self._metadata_cache: Dict[str, Any] = dict()
         self.otu_data = otu_data_copy
+        self.validation_timings: Dict[str, float] = dict(biom_type.timings)
+        self.validation_level = validation_level
+
+    def _clear_cache(self) -> None:
+        """
+            Invalidate the cached properties of the instance
+
+            Notes
+            -----
+            This is called whenever `otu_data` is replaced
+        """
+        self._norm_cache.clear()
+        self._metadata_cache.clear()
+
+    @property
+    def otu_data(self) -> Table:
+        """ OTU counts table in the `biom.Table` format """
+        return self._otu_data
+
+    @otu_data.setter
+    def otu_data(self, otu_data: Table) -> None:
+        self._otu_data = otu_data
+        self._clear_cache()
+
+    @classmethod
+    def _from_table(cls, otu_data: Table, validation_level: str) -> "Otu":
+        """
+            Create `Otu` instance that owns a table derived from a validated instance
+
+            Parameters
+            ----------
+            otu_data : Table
+                A freshly created `biom.Table` that is not shared with any other object
+            validation_level : {'full', 'structural', 'none'}
+                The validation level of the instance that `otu_data` was derived from
+
+            Returns
+            -------
+            Otu
+                An instance of the `Otu` class wrapping `otu_data` without a copy
+        """
+        otu = cls(otu_data, copy=False, validation_level="none")
+        otu.validation_level = validation_level
+        return otu
+
+    def _axis_labels(
+        self, axis: str, inds: Optional[np.ndarray] = None, picklable: bool = False
+    ) -> AxisLabels:
+        """
+            Select the ids and metadata of the requested indices along `axis`
+
+            Parameters
+            ----------
+            axis : {'sample', 'observation'}
+                The axis of the labels
+            inds : np.ndarray, optional
+                The integer positions of the samples or observations
+                Default is all the samples or observations
+            picklable : bool, optional
+                If True the metadata is converted to plain dicts that can be pickled
+                Default is False
+
+            Returns
+            -------
+            Tuple[np.ndarray, list]
+                A copy of the ids and the metadata (None if the axis has no metadata)
+        """
+        ids = self.otu_data.ids(axis=axis)
+        metadata = self.otu_data.metadata(axis=axis)
+        if inds is None:
+            ids = ids.copy()
+        else:
+            ids = ids[inds]
+            if metadata is not None:
+                metadata = [metadata[i] for i in inds]
+        # NOTE: plain dicts since the biom metadata defaultdicts cannot be pickled
+        if picklable and metadata is not None:
+            metadata = [dict(md) for md in metadata]
+        return ids, metadata
+
+    def _take_labels(
+        self, inds: np.ndarray, axis: str, shared_labels: Optional[AxisLabels] = None
+    ) -> Tuple[np.ndarray, np.ndarray, Optional[list], Optional[list]]:
+        """
+            Select the ids and metadata for the requested indices along `axis`
+
+            Parameters
+            ----------
+            inds : np.ndarray
+                The integer positions of the samples or observations to keep
+            axis : {'sample', 'observation'}
+                The axis along which to slice the table
+            shared_labels : Tuple[np.ndarray, list], optional
+                The labels of the other axis, computed once when slicing many tables
+                Default is the labels from `_axis_labels`
+
+            Returns
+            -------
+            Tuple[np.ndarray, np.ndarray, list, list]
+                The observation ids, sample ids, observation metadata and sample metadata
+        """
+        if axis not in {"sample", "observation"}:
+            raise ValueError("Axis must of either {'sample' or 'observation'}")
+        if shared_labels is None:
+            shared_axis = "observation" if axis == "sample" else "sample"
+            shared_labels = self._axis_labels(shared_axis)
+        return _order_labels(axis, self._axis_labels(axis, inds), shared_labels)
+
+    def _take(
+        self,
+        inds: np.ndarray,
+        axis: str,
+        matrix: Optional[sparse.spmatrix] = None,
+        shared_labels: Optional[AxisLabels] = None,
+    ) -> Table:
+        """
+            Create a new table containing only the requested indices along `axis`
+
+            Parameters
+            ----------
+            inds : np.ndarray
+                The integer positions of the samples or observations to keep
+            axis : {'sample', 'observation'}
+                The axis along which to slice the table
+            matrix : sparse.spmatrix, optional
+                The counts matrix already converted to CSC (sample) or CSR (observation)
+                Default is the `matrix_data` of the instance
+            shared_labels : Tuple[np.ndarray, list], optional
+                The labels of the other axis, computed once when slicing many tables
+
+            Returns
+            -------
+            Table
+                A new `biom.Table` that shares no data with the current instance
+        """
+        labels = self._take_labels(inds, axis, shared_labels)
+        if matrix is None:
+            matrix = self.otu_data.matrix_data
+        return _slice_table(matrix, inds, axis, *labels, self.otu_data.type)
 
     def __repr__(self) -> str:
         n_obs, n_samples = self.otu_data.shape
@@ -85,6 +619,9 @@ class Otu:
         tax_file: Optional[str] = None,
         dtype: str = "biom",
         ext: Optional[str] = None,
+        subset: Optional[Iterable[str]] = None,
+        subset_axis: str = "sample",
+        validation_level: str = "full",
     ) -> "Otu":
         """
             Load data from files into the `Otu` class instance
@@ -97,28 +634,96 @@ class Otu:
                 The path to the sample metadata file
             tax_file : str, optional
                 The path to the taxonomy file
-            dtype : {'biom', 'tsv'}
+            dtype : {'biom', 'tsv', 'npz'}
                 The type of OTU file that is input
+                'npz' files are the cache files written by `Otu.write`
             ext : str, optional
                 The extension of the file if other than supported extensions
                 Supported extensions:
                 - 'tsv' dtype: 'tsv', 'txt', 'counts'
                 - 'biom' dtype: 'biom', 'hdf5'
+            subset : Iterable[str], optional
+                The ids of the samples or observations to load
+                For `HDF5` biom files only the matching slices of the count
+                matrix are read from disk, the rest of the file is not loaded
+                The rows of the other axis that are empty in the subset are
+                removed for every `dtype`
+            subset_axis : {'sample', 'observation'}, optional
+                The axis of the `subset` ids
+                Default is 'sample'
+            validation_level : {'full', 'structural', 'none'}, optional
+                The level of validation applied to the loaded table
+                Use 'full' for external input and 'structural' for tables
+                written by an earlier mindpipe step
+                Default is 'full'
 
             Returns
             -------
             Otu
                 An instance of the `Otu` class
+
+            Notes
+            -----
+            Use `Otu.load_ids` to read the ids of a file without its counts
         """
-        otu_validator = OtuValidator(dtype=dtype, ext=ext)
+        if subset_axis not in {"sample", "observation"}:
+            raise ValueError("Axis must of either {'sample' or 'observation'}")
         otu_path = pathlib.Path(otu_file)
+        if dtype == "npz":
+            if not otu_path.exists():
+                raise FileNotFoundError("Missing input files")
+            otu_data, written_level = _read_npz(otu_path)
+            if subset is not None:
+                OtuValidator.subset_table(otu_data, subset, subset_axis)
+            # NOTE: validation is only skipped if the checks run before writing
+            # include every check of the requested level
+            if validation_level not in BiomType.levels:
+                raise ValueError(
+                    f"Validation level must be one of {list(BiomType.levels)}"
+                )
+            written_checks = set(BiomType.levels[written_level])
+            if set(BiomType.levels[validation_level]) <= written_checks:
+                return cls._from_table(otu_data, written_level)
+            return cls(otu_data, copy=False, validation_level=validation_level)
+        otu_validator = OtuValidator(
+            dtype=dtype, ext=ext, validation_level=validation_level
+        )
         if otu_path.exists():
             meta_path = pathlib.Path(meta_file) if meta_file else meta_file
             tax_path = pathlib.Path(tax_file) if tax_file else tax_file
-            otu_data = otu_validator.load_validate(otu_path, meta_path, tax_path)
+            otu_data = otu_validator.load_validate(
+                otu_path, meta_path, tax_path, subset=subset, subset_axis=subset_axis
+            )
         else:
             raise FileNotFoundError("Missing input files")
-        return cls(otu_data)
+        # NOTE: `load_validate` already validates the freshly loaded table
+        otu = cls(otu_data, copy=False, validation_level="none")
+        otu.validation_timings = otu_validator.timings
+        otu.validation_level = validation_level
+        return otu
+
+    @staticmethod
+    def load_ids(otu_file: str, axis: str = "sample") -> List[str]:
+        """
+            Read the sample or observation ids of an `OTU` file
+
+            Parameters
+            ----------
+            otu_file : str
+                The path to the `OTU` counts file in `biom` format
+            axis : {'sample', 'observation'}, optional
+                The axis whose ids are read
+                Default is 'sample'
+
+            Returns
+            -------
+            List[str]
+                The ids along `axis`, in file order
+        """
+        otu_path = pathlib.Path(otu_file)
+        if not otu_path.exists():
+            raise FileNotFoundError("Missing input files")
+        return OtuValidator.load_ids(otu_path, axis=axis)
 
     @property
     def sample_metadata(self) -> pd.DataFrame:
@@ -128,8 +733,15 @@ class Otu:
             Returns
             -------
             pd.DataFrame
+
+            Notes
+            -----
+            The `DataFrame` is computed once and cached; it must not be modified
         """
-        return self.otu_data.metadata_to_dataframe("sample")
+        if "sample_metadata" not in self._metadata_cache:
+            df = self.otu_data.metadata_to_dataframe("sample")
+            self._metadata_cache["sample_metadata"] = df
+        return self._metadata_cache["sample_metadata"]
 
     @property
     def obs_metadata(self) -> pd.DataFrame:
@@ -139,14 +751,20 @@ class Otu:
             Returns
             -------
             pd.DataFrame
+
+            Notes
+            -----
+            The `DataFrame` is computed once and cached; it must not be modified
         """
-        df = self.otu_data.metadata_to_dataframe("observation")
-        n_tax_levels = len(df.columns)
-        lineage = list(Lineage._fields)
-        # Unknown ordering if observation metadata contains extra columns
-        if set(df.columns) - set(lineage):
-            return df
-        return df[lineage[:n_tax_levels]]
+        if "obs_metadata" not in self._metadata_cache:
+            df = self.otu_data.metadata_to_dataframe("observation")
+            n_tax_levels = len(df.columns)
+            lineage = list(Lineage._fields)
+            # Unknown ordering if observation metadata contains extra columns
+            if not set(df.columns) - set(lineage):
+                df = df[lineage[:n_tax_levels]]
+            self._metadata_cache["obs_metadata"] = df
+        return self._metadata_cache["obs_metadata"]
 
     @property
     def tax_level(self) -> str:
@@ -158,8 +776,10 @@ class Otu:
             str
                 The lowest taxonomy defined in the Otu instance
         """
-        n_tax_levels = len(self.obs_metadata.columns)
-        return Lineage._fields[n_tax_levels - 1]
+        if "tax_level" not in self._metadata_cache:
+            n_tax_levels = len(self.obs_metadata.columns)
+            self._metadata_cache["tax_level"] = Lineage._fields[n_tax_levels - 1]
+        return self._metadata_cache["tax_level"]
 
     def filter(
         self,
@@ -194,9 +814,150 @@ class Otu:
             otu_filtered = self.otu_data.filter(func, inplace=False, axis=axis)
         else:
             raise TypeError("Either ids or func must be supplied")
-        return Otu(otu_filtered)
+        return self._from_table(otu_filtered, self.validation_level)
+
+    def _rarefy(self, depth: Optional[int], seed: Optional[int], workers: int) -> Table:
+        """
+            Rarefy the samples of the OTU table to an even depth
 
-    def normalize(self, axis: str = "sample", method: str = "norm") -> "Otu":
+            Parameters
+            ----------
+            depth : int, optional
+                The number of reads per sample after rarefaction
+                Samples with fewer reads are removed
+                If None the depth of the shallowest sample with reads is used
+                It must not be larger than the reads of the deepest sample
+            seed : int, optional
+                The seed for the random number generator
+            workers : int
+                The number of processes used to rarefy blocks of samples
+
+            Returns
+            -------
+            Table
+                The rarefied `biom.Table`
+        """
+        matrix = self.otu_data.matrix_data.tocsc()
+        if not np.allclose(matrix.data, np.round(matrix.data)):
+            raise ValueError("Rarefaction requires an Otu instance with integer counts")
+        depths = np.round(np.asarray(matrix.sum(axis=0)).ravel())
+        if depth is None:
+            # NOTE: empty samples are ignored, otherwise every sample is rarefied to 0 reads
+            nonempty_depths = depths[depths > 0]
+            if not len(nonempty_depths):
+                raise ValueError("Rarefaction requires at least one sample with reads")
+            depth = int(nonempty_depths.min())
+        elif depth != int(depth) or depth < 1:
+            raise ValueError("Rarefaction depth must be a positive integer")
+        elif depth > depths.max():
+            raise ValueError(
+                f"Rarefaction depth {depth} is larger than the reads of every sample "
+                f"(at most {int(depths.max())})"
+            )
+        depth = int(depth)
+        sample_inds = np.flatnonzero(depths >= depth)
+        table = self._take(sample_inds, axis="sample")
+        matrix = table.matrix_data.tocsc()
+        counts = np.round(matrix.data).astype(np.int64)
+        # NOTE: blocks (and their seeds) do not depend on `workers` for reproducibility
+        block_starts = list(range(0, len(sample_inds), RAREFY_BLOCK_SIZE))
+        seeds = np.random.SeedSequence(seed).spawn(len(block_starts))
+        block_indptrs, block_counts = [], []
+        for block_start in block_starts:
+            block_stop = block_start + RAREFY_BLOCK_SIZE + 1
+            block_ptr = matrix.indptr[block_start:block_stop]
+            count_start, count_stop = block_ptr[0], block_ptr[-1]
+            block_indptrs.append(block_ptr - count_start)
+            block_counts.append(counts[count_start:count_stop])
+        depths = [depth] * len(block_starts)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                rarefied = list(
+                    executor.map(
+                        _rarefy_columns, block_indptrs, block_counts, depths, seeds
+                    )
+                )
+        else:
+            rarefied = list(
+                map(_rarefy_columns, block_indptrs, block_counts, depths, seeds)
+            )
+        data = np.concatenate(rarefied) if rarefied else counts
+        rarefied_matrix = sparse.csc_matrix(
+            (data.astype(float), matrix.indices, matrix.indptr), shape=matrix.shape
+        )
+        rarefied_matrix.eliminate_zeros()
+        return Table(
+            rarefied_matrix,
+            table.ids(axis="observation"),
+            table.ids(axis="sample"),
+            observation_metadata=table.metadata(axis="observation"),
+            sample_metadata=table.metadata(axis="sample"),
+            type=table.type,
+        )
+
+    def _css(self, quantile: float, scale: float) -> Table:
+        """
+            Normalize the samples of the OTU table using cumulative sum scaling
+
+            Parameters
+            ----------
+            quantile : float
+                The quantile of the nonzero counts of a sample up to which counts are summed
+            scale : float
+                The value the normalized counts are multiplied by
+
+            Returns
+            -------
+            Table
+                The CSS normalized `biom.Table`
+
+            Notes
+            -----
+            Paulson et al. (2013) Differential abundance analysis for microbial
+            marker-gene surveys. Nature Methods 10, 1200–1202
+        """
+        matrix = self.otu_data.matrix_data.tocsc()
+        matrix.eliminate_zeros()
+        n_samples = matrix.shape[1]
+        nnz = np.diff(matrix.indptr)
+        col_inds = np.repeat(np.arange(n_samples), nnz)
+        # Sort the nonzero counts within every sample
+        sorted_data = matrix.data[np.lexsort((matrix.data, col_inds))]
+        # Linear interpolation between the order statistics (same as `np.quantile`)
+        pos = matrix.indptr[:-1] + quantile * np.maximum(nnz - 1, 0)
+        lo = np.minimum(np.floor(pos).astype(int), len(sorted_data) - 1)
+        hi = np.minimum(np.ceil(pos).astype(int), len(sorted_data) - 1)
+        if len(sorted_data):
+            frac = pos - np.floor(pos)
+            quantiles = sorted_data[lo] * (1 - frac) + sorted_data[hi] * frac
+        else:
+            quantiles = np.zeros(n_samples)
+        below_quantile = matrix.data <= quantiles[col_inds]
+        cumsums = np.bincount(
+            col_inds[below_quantile],
+            weights=matrix.data[below_quantile],
+            minlength=n_samples,
+        )
+        factors = np.divide(scale, cumsums, out=np.zeros(n_samples), where=cumsums > 0)
+        css_matrix = matrix @ sparse.diags(factors)
+        return Table(
+            css_matrix,
+            self.otu_data.ids(axis="observation"),
+            self.otu_data.ids(axis="sample"),
+            observation_metadata=self.otu_data.metadata(axis="observation"),
+            sample_metadata=self.otu_data.metadata(axis="sample"),
+            type=self.otu_data.type,
+        )
+
+    def normalize(
+        self,
+        axis: str = "sample",
+        method: str = "norm",
+        depth: Optional[int] = None,
+        seed: Optional[int] = None,
+        workers: int = 1,
+        quantile: float = CSS_QUANTILE,
+    ) -> "Otu":
         """
             Normalize the OTU table along the provided axis
 
@@ -207,6 +968,20 @@ class Otu:
                 Default is 'sample'
             method: {'norm', 'rarefy', 'css'}
                 Normalization method to use
+            depth : int, optional
+                The rarefaction depth. Only used when method is 'rarefy'
+                Samples with fewer reads are removed
+                It must not be larger than the reads of the deepest sample
+                Default is the depth of the shallowest sample with reads
+            seed : int, optional
+                The seed used for rarefaction
+            workers : int, optional
+                The number of processes used for rarefaction
+                Default is 1
+            quantile : float, optional
+                The quantile of the nonzero counts of a sample up to which counts
+                are summed. Only used when method is 'css'
+                Default is 0.5
 
             Returns
             -------
@@ -216,25 +991,99 @@ class Otu:
         if method == "norm":
             norm_otu = self.otu_data.norm(axis=axis, inplace=False)
         elif method == "rarefy":
-            raise NotImplementedError("This method is not implemented yet")
+            if axis != "sample":
+                raise ValueError("Rarefaction is only supported along the sample axis")
+            norm_otu = self._rarefy(depth, seed, workers)
         elif method == "css":
-            raise NotImplementedError("This method is not implemented yet")
+            if axis != "sample":
+                raise ValueError("CSS is only supported along the sample axis")
+            if not 0 <= quantile <= 1:
+                raise ValueError("CSS quantile must be between 0 and 1")
+            norm_otu = self._css(quantile, CSS_SCALE)
         else:
             raise ValueError(
                 "Invalid method. Supported methods are {'norm', 'rarefy', 'css'}"
             )
-        return Otu(norm_otu)
+        return self._from_table(norm_otu, self.validation_level)
+
+    def transform(
+        self,
+        method: str = "clr",
+        pseudocount: float = 1.0,
+        reference: Optional[str] = None,
+        block_size: int = 1000,
+    ) -> pd.DataFrame:
+        """
+            Apply a compositional log-ratio transform to every sample
+
+            Parameters
+            ----------
+            method : {'clr', 'alr'}, optional
+                The centered ('clr') or additive ('alr') log-ratio transform
+                Default is 'clr'
+            pseudocount : float, optional
+                The value added to all the abundances to replace the zeros
+                Default is 1.0
+            reference : str, optional
+                The id of the reference observation for the 'alr' transform
+                Default is the last observation
+            block_size : int, optional
+                The number of samples that are densified at a time
+                Default is 1000
+
+            Returns
+            -------
+            pd.DataFrame
+                The transformed (float32) abundances with observations as rows
+
+            Notes
+            -----
+            The result is returned as a `DataFrame` since log-ratios can be negative
+        """
+        if method not in {"clr", "alr"}:
+            raise ValueError("Invalid method. Supported methods are {'clr', 'alr'}")
+        if pseudocount <= 0:
+            raise ValueError("The pseudocount must be positive")
+        matrix = self.otu_data.matrix_data.tocsc()
+        obs_ids = self.otu_data.ids(axis="observation")
+        sample_ids = self.otu_data.ids(axis="sample")
+        n_obs, n_samples = matrix.shape
+        if method == "alr":
+            ref_ind = n_obs - 1
+            if reference is not None:
+                if not self.otu_data.exists(reference, axis="observation"):
+                    raise ValueError(f"{reference} is not a valid observation id")
+                ref_ind = self.otu_data.index(reference, axis="observation")
+            keep_inds = np.delete(np.arange(n_obs), ref_ind)
+        else:
+            keep_inds = np.arange(n_obs)
+        transformed = np.empty((len(keep_inds), n_samples), dtype=np.float32)
+        for start in range(0, n_samples, block_size):
+            stop = start + block_size
+            block = matrix[:, start:stop].toarray().astype(np.float32)
+            log_block = np.log(block + np.float32(pseudocount))
+            if method == "clr":
+                log_block -= log_block.mean(axis=0)
+            else:
+                log_block = log_block[keep_inds] - log_block[ref_ind]
+            transformed[:, start:stop] = log_block
+        return pd.DataFrame(transformed, index=obs_ids[keep_inds], columns=sample_ids)
 
     def is_norm(self, axis: str = "sample") -> bool:
         """
             Returns true if the Otu instance has been normalized
+
+            Notes
+            -----
+            The sums are computed on the sparse matrix and cached on the instance
         """
-        df = self.otu_data.to_dataframe()
-        if axis == "sample":
-            return bool(np.isclose(df.sum(axis=0), 1.0).all())
-        if axis == "observation":
-            return bool(np.isclose(df.sum(axis=1), 1.0).all())
-        raise ValueError("Axis must of either {'sample' or 'observation'}")
+        if axis not in {"sample", "observation"}:
+            raise ValueError("Axis must of either {'sample' or 'observation'}")
+        if axis not in self._norm_cache:
+            sum_axis = 0 if axis == "sample" else 1
+            sums = np.asarray(self.otu_data.matrix_data.sum(axis=sum_axis)).ravel()
+            self._norm_cache[axis] = bool(np.isclose(sums, 1.0).all())
+        return self._norm_cache[axis]
 
     def rm_sparse_samples(self, count_thres: int = 500) -> "Otu":
         """
@@ -260,9 +1109,10 @@ class Otu:
             raise ValueError(
                 "Otu instance is normalized and hence will not work with this method"
             )
-        filt_fun = lambda val, *_: round(val.sum()) >= count_thres
-        new_otu = self.otu_data.filter(filt_fun, axis="sample", inplace=False)
-        return Otu(new_otu)
+        depths = np.asarray(self.otu_data.matrix_data.sum(axis=0)).ravel()
+        sample_inds = np.flatnonzero(np.round(depths) >= count_thres)
+        new_otu = self._take(sample_inds, axis="sample")
+        return self._from_table(new_otu, self.validation_level)
 
     def rm_sparse_obs(
         self, prevalence_thres: float = 0.05, abundance_thres: float = 0.01
@@ -282,36 +1132,83 @@ class Otu:
             Otu
                 Otu instance with bad observations removed
         """
-        filt_fun = (
-            lambda val, *_: (val.astype(int).astype(bool).mean()) >= prevalence_thres
-        )
-        otu_dense_obs = self.otu_data.filter(
-            filt_fun, axis="observation", inplace=False
+        matrix = self.otu_data.matrix_data.tocsr()
+        n_obs, n_samples = matrix.shape
+        row_inds = np.repeat(np.arange(n_obs), np.diff(matrix.indptr))
+        present = np.trunc(matrix.data) != 0
+        prevalence = np.bincount(row_inds[present], minlength=n_obs) / n_samples
+        dense_obs = prevalence >= prevalence_thres
+        # NOTE: relative abundances are computed over the prevalent observations only
+        dense_nnz = dense_obs[row_inds]
+        dense_sums = np.bincount(
+            matrix.indices[dense_nnz],
+            weights=matrix.data[dense_nnz],
+            minlength=n_samples,
         )
-        otu_df = otu_dense_obs.to_dataframe()
-        otu_rel_abund = (otu_df / otu_df.sum(axis=0)).to_dense()
-        ind_above_thres = otu_rel_abund.index[
-            (otu_rel_abund > abundance_thres).any(axis=1)
-        ]
-        new_otu = self.otu_data.filter(
-            ind_above_thres, axis="observation", inplace=False
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rel_abund = matrix.data / dense_sums[matrix.indices]
+        above_thres = dense_nnz & (rel_abund > abundance_thres)
+        keep_obs = np.zeros(n_obs, dtype=bool)
+        keep_obs[row_inds[above_thres]] = True
+        keep_inds = np.flatnonzero(keep_obs)
+        merged_nnz = ~keep_obs[row_inds]
+        merged_row = np.bincount(
+            matrix.indices[merged_nnz],
+            weights=matrix.data[merged_nnz],
+            minlength=n_samples,
         )
-        ind_below_thres = set(self.otu_data.ids("observation")) - set(ind_above_thres)
-        otu_sparse_obs = self.otu_data.filter(
-            ind_below_thres, axis="observation", inplace=False
+        new_matrix = sparse.vstack(
+            [matrix[keep_inds], sparse.csr_matrix(merged_row)], format="csr"
         )
-        new_row = Table(
-            otu_sparse_obs.sum(axis="sample"),
-            ["otu_merged"],
+        obs_ids = self.otu_data.ids(axis="observation")
+        new_obs_ids = list(obs_ids[keep_inds]) + ["otu_merged"]
+        obs_metadata = self.otu_data.metadata(axis="observation") or [{}] * n_obs
+        merged_lineage = Lineage("Unclassified").to_dict(self.tax_level)
+        # NOTE: `metadata_to_dataframe` expects the same key order for every observation
+        if n_obs and set(obs_metadata[0]) == set(merged_lineage):
+            merged_lineage = {k: merged_lineage[k] for k in obs_metadata[0]}
+        new_obs_metadata = [dict(obs_metadata[i]) for i in keep_inds] + [merged_lineage]
+        final_otu = Table(
+            new_matrix,
+            new_obs_ids,
             self.otu_data.ids(axis="sample"),
+            observation_metadata=new_obs_metadata,
+            sample_metadata=self.otu_data.metadata(axis="sample"),
         )
-        tax_level = self.tax_level
-        new_row.add_metadata(
-            {"otu_merged": Lineage("Unclassified").to_dict(tax_level)},
-            axis="observation",
-        )
-        final_otu = new_otu.concat([new_row], axis="observation")
-        return Otu(final_otu)
+        return self._from_table(final_otu, self.validation_level)
+
+    def _partition_indices(
+        self, axis: str, func: Hashfun
+    ) -> Dict[Hashable, np.ndarray]:
+        """
+            Compute the indices of the members of every partition along `axis`
+
+            Parameters
+            ----------
+            axis : str
+                The axis on which to partition
+            func : Callable[[str, dict], Hashable]
+                The function that takes in (id, metadata) and returns a hashable
+
+            Returns
+            -------
+            Dict[Hashable, np.ndarray]
+                The integer positions along `axis` of the members of every partition
+        """
+        if axis == "observation" and self.is_norm(axis="sample"):
+            raise ValueError(
+                "Cannot partition sample normalized Otu instance on observation"
+            )
+        if axis == "sample" and self.is_norm(axis="observation"):
+            raise ValueError(
+                "Cannot partition observation normalized Otu instance on sample"
+            )
+        ids = self.otu_data.ids(axis=axis)
+        metadata = self.otu_data.metadata(axis=axis) or [None] * len(ids)
+        groups: Dict[Hashable, List[int]] = dict()
+        for ind, (id_, md) in enumerate(zip(ids, metadata)):
+            groups.setdefault(func(id_, md), []).append(ind)
+        return {label: np.array(inds) for label, inds in groups.items()}
 
     def partition(self, axis: str, func: Hashfun) -> Iterable[Tuple[str, "Otu"]]:
         """
@@ -334,17 +1231,202 @@ class Otu:
             1. To group by lineage "level" use:
                 func = lambda id_, md: Lineage(**md).get_superset(level)
         """
-        if axis == "observation" and self.is_norm(axis="sample"):
-            raise ValueError(
-                "Cannot partition sample normalized Otu instance on observation"
-            )
-        if axis == "sample" and self.is_norm(axis="observation"):
-            raise ValueError(
-                "Cannot partition observation normalized Otu instance on sample"
+        partitions = self._partition_indices(axis, func)
+        if axis == "sample":
+            matrix = self.otu_data.matrix_data.tocsc()
+            shared_labels = self._axis_labels("observation")
+        else:
+            matrix = self.otu_data.matrix_data.tocsr()
+            shared_labels = self._axis_labels("sample")
+        for label, inds in partitions.items():
+            table = self._take(inds, axis, matrix, shared_labels)
+            yield label, self._from_table(table, self.validation_level)
+
+    def map_partitions(
+        self,
+        axis: str,
+        func: Hashfun,
+        apply_func: Callable[[Hashable, "Otu"], Any],
+        workers: int = 1,
+    ) -> Dict[Hashable, Any]:
+        """
+            Partition the Otu instance and apply `apply_func` to every partition
+
+            Parameters
+            ----------
+            axis : str
+                The axis on which to partition
+            func : Callable[[str, dict], Hashable]
+                The function that takes in (id, metadata) and returns a hashable
+            apply_func : Callable[[Hashable, Otu], Any]
+                The function that takes in (label, Otu) and returns the result
+                Must be picklable (defined at module level) if `workers` > 1
+            workers : int, optional
+                The number of processes used to apply `apply_func`
+                Default is 1
+
+            Returns
+            -------
+            Dict[Hashable, Any]
+                The result of `apply_func` for every partition label
+
+            Notes
+            -----
+            With multiple workers the counts matrix is placed in shared memory once
+            and every worker only copies the slice belonging to its partition
+            The labels of the axis that is not partitioned are sent once per worker
+            Multiple workers require Python 3.8 or newer (`multiprocessing.shared_memory`)
+        """
+        if workers <= 1:
+            return {
+                label: apply_func(label, otu)
+                for label, otu in self.partition(axis, func)
+            }
+        try:
+            import multiprocessing.shared_memory  # noqa: F401
+        except ImportError:
+            raise RuntimeError(
+                "map_partitions with workers > 1 requires Python 3.8 or newer"
             )
-        partitions = self.otu_data.partition(func, axis=axis)
-        for label, table in partitions:
-            yield label, Otu(table)
+        partitions = list(self._partition_indices(axis, func).items())
+        if axis == "sample":
+            matrix = self.otu_data.matrix_data.tocsc()
+            shared_labels = self._axis_labels("observation", picklable=True)
+        else:
+            matrix = self.otu_data.matrix_data.tocsr()
+            shared_labels = self._axis_labels("sample", picklable=True)
+        shared = [
+            _share_array(array)
+            for array in (matrix.data, matrix.indices, matrix.indptr)
+        ]
+        matrix_spec = {
+            "arrays": [spec for _, spec in shared],
+            "shape": matrix.shape,
+            "type": self.otu_data.type,
+            "validation_level": self.validation_level,
+        }
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_partition_worker,
+                initargs=(matrix_spec, shared_labels),
+            ) as executor:
+                futures = {
+                    label: executor.submit(
+                        _apply_partition,
+                        {
+                            "label": label,
+                            "axis": axis,
+                            "inds": inds,
+                            "labels": self._axis_labels(axis, inds, picklable=True),
+                        },
+                        apply_func,
+                    )
+                    for label, inds in partitions
+                }
+                return {label: future.result() for label, future in futures.items()}
+        finally:
+            for shm, _ in shared:
+                shm.close()
+                shm.unlink()
+
+    def _unique_lineages(self) -> Tuple[np.ndarray, List[Lineage]]:
+        """
+            Resolve each unique observation metadata row to its `Lineage` only once
+
+            Returns
+            -------
+            Tuple[np.ndarray, List[Lineage]]
+                The index of the unique lineage of every observation and the unique lineages
+        """
+        obs_metadata = self.obs_metadata
+        # NOTE: the rows are factorized as tuples since MultiIndex.from_frame needs pandas>=0.24
+        rows = pd.Series(
+            list(obs_metadata.itertuples(index=False, name=None)), dtype=object
+        )
+        raw_codes, raw_uniques = pd.factorize(rows.values)
+        lineages = [
+            Lineage(**dict(zip(obs_metadata.columns, row))) for row in raw_uniques
+        ]
+        return raw_codes, lineages
+
+    @staticmethod
+    def _group_lineages(
+        tree: LineageTree, nodes: np.ndarray, level: str
+    ) -> Tuple[np.ndarray, np.ndarray, List[Lineage]]:
+        """
+            Group the nodes of a lineage tree by their superset at `level`
+
+            Parameters
+            ----------
+            tree : LineageTree
+                The tree of the lineages to be grouped
+            nodes : np.ndarray
+                The nodes to be grouped
+            level : str
+                The tax level used to compute the supersets
+
+            Returns
+            -------
+            Tuple[np.ndarray, np.ndarray, List[Lineage]]
+                The group index of every node, the node and the lineage of every group
+                Groups are ordered by their first appearance in `nodes`
+        """
+        codes, group_nodes = pd.factorize(tree.get_supersets(nodes, level))
+        group_lineages = [tree.get_lineage(node) for node in group_nodes]
+        return codes, group_nodes, group_lineages
+
+    def _collapse_groups(
+        self,
+        matrix: sparse.csr_matrix,
+        child_ids: np.ndarray,
+        group_codes: np.ndarray,
+        group_lineages: List[Lineage],
+        level: str,
+    ) -> Tuple[Table, Dict[str, List[str]]]:
+        """
+            Sum the rows of `matrix` that belong to the same group
+
+            Parameters
+            ----------
+            matrix : sparse.csr_matrix
+                The counts matrix whose rows are to be collapsed
+            child_ids : np.ndarray
+                The ids of the rows of `matrix`
+            group_codes : np.ndarray
+                The group index of every row of `matrix`
+            group_lineages : List[Lineage]
+                The lineage of every group
+            level : str
+                The tax level of the collapsed table
+
+            Returns
+            -------
+            Tuple[Table, Dict[str, List[str]]]
+                The collapsed table and the mapping {obs_id => [children]}
+        """
+        n_groups, n_rows = len(group_lineages), len(group_codes)
+        group_matrix = sparse.csr_matrix(
+            (np.ones(n_rows), (group_codes, np.arange(n_rows))),
+            shape=(n_groups, n_rows),
+        )
+        collapsed_matrix = group_matrix @ matrix
+        obs_ids = [f"{level}_{i}" for i in range(n_groups)]
+        order = np.argsort(group_codes, kind="stable")
+        splits = np.cumsum(np.bincount(group_codes, minlength=n_groups))[:-1]
+        children_dict = {
+            obs_id: list(children)
+            for obs_id, children in zip(obs_ids, np.split(child_ids[order], splits))
+        }
+        new_table = Table(
+            collapsed_matrix,
+            obs_ids,
+            self.otu_data.ids(axis="sample"),
+            observation_metadata=[lineage.to_dict(level) for lineage in group_lineages],
+            sample_metadata=self.otu_data.metadata(axis="sample"),
+            type=self.otu_data.type,
+        )
+        return new_table, children_dict
 
     def collapse_taxa(self, level: str) -> Tuple["Otu", Dict[str, List[str]]]:
         """
@@ -363,50 +1445,101 @@ class Otu:
         """
         if level not in Lineage._fields:
             raise ValueError(f"level must be one of {Lineage._fields}")
-        cfunc = lambda id_, md: str(Lineage(**md).get_superset(level))
-        otu_collapse = self.otu_data.collapse(
-            cfunc, axis="observation", norm=False, include_collapsed_metadata=True
+        raw_codes, raw_lineages = self._unique_lineages()
+        tree = LineageTree(raw_lineages)
+        lineage_codes, _, group_lineages = self._group_lineages(
+            tree, tree.leaves, level
         )
-        curr_ids = otu_collapse.ids(axis="observation")
-        children_group_list = [
-            i["collapsed_ids"] for i in otu_collapse.metadata(axis="observation")
-        ]
-        children_groups = dict(zip(curr_ids, children_group_list))
-        otu_collapse.del_metadata(axis="observation")
-        afunc = lambda x: pd.Series(
-            Lineage(**x.to_dict()).get_superset(level).to_dict(level)
+        new_table, children_dict = self._collapse_groups(
+            self.otu_data.matrix_data.tocsr(),
+            self.otu_data.ids(axis="observation"),
+            lineage_codes[raw_codes],
+            group_lineages,
+            level,
         )
-        obs_collapse = self.obs_metadata.apply(afunc, axis=1)
-        gfunc = lambda x: str(Lineage(**x.to_dict()))
-        obs_collapse.index = obs_collapse.apply(gfunc, axis=1)
-        obs_collapse.drop_duplicates(inplace=True)
-        otu_collapse.add_metadata(
-            obs_collapse.to_dict(orient="index"), axis="observation"
-        )
-        obs_dict = json.loads(
-            otu_collapse.metadata_to_dataframe("observation").to_json(orient="split")
-        )
-        unq_id_map = {k: f"{level}_{i}" for i, k in enumerate(curr_ids)}
-        obs_ids = [unq_id_map[i] for i in obs_dict["index"]]  # get ordered unique ids
-        children_dict = {unq_id_map[k]: v for k, v in children_groups.items()}
-        sample_ids = otu_collapse.ids(axis="sample")
-        observation_metadata = otu_collapse.metadata_to_dataframe(
-            axis="observation"
-        ).to_dict(orient="records")
-        sample_metadata = otu_collapse.metadata_to_dataframe(axis="sample").to_dict(
-            orient="records"
-        )
-        new_table = Table(
-            otu_collapse.matrix_data,
-            obs_ids,
-            sample_ids,
-            observation_metadata=observation_metadata,
-            sample_metadata=sample_metadata,
-        )
-        return Otu(new_table), children_dict
+        return self._from_table(new_table, self.validation_level), children_dict
+
+    def collapse_taxa_levels(
+        self, levels: Iterable[str]
+    ) -> Dict[str, Tuple["Otu", Dict[str, List[str]]]]:
+        """
+            Collapse Otu instance on multiple tax levels in a single pass
+
+            Parameters
+            ----------
+            levels : Iterable[str]
+                The tax levels of the collapsed tables
+
+            Returns
+            -------
+            Dict[str, Tuple[Otu, dict]]
+                The collapsed Otu instance and children map for every level
+                Levels are ordered from the lowest to the highest tax level
+
+            Notes
+            -----
+            Every level is collapsed from the result of the next lower requested level
+            Therefore the children of a level are the ids of the next lower level
+            This is equivalent to calling `collapse_taxa` successively on the results
+        """
+        unknown = set(levels) - set(Lineage._fields)
+        if unknown:
+            raise ValueError(f"level must be one of {Lineage._fields}")
+        sorted_levels = sorted(set(levels), key=Lineage._fields.index, reverse=True)
+        # row_codes maps every row of the current matrix to its entry in nodes
+        row_codes, lineages = self._unique_lineages()
+        tree = LineageTree(lineages)
+        nodes = tree.leaves
+        matrix = self.otu_data.matrix_data.tocsr()
+        child_ids = self.otu_data.ids(axis="observation")
+        collapsed: Dict[str, Tuple["Otu", Dict[str, List[str]]]] = dict()
+        for level in sorted_levels:
+            lineage_codes, group_nodes, group_lineages = self._group_lineages(
+                tree, nodes, level
+            )
+            new_table, children_dict = self._collapse_groups(
+                matrix, child_ids, lineage_codes[row_codes], group_lineages, level
+            )
+            collapsed[level] = (
+                self._from_table(new_table, self.validation_level),
+                children_dict,
+            )
+            # The next level aggregates the (smaller) collapsed matrix of this level
+            matrix = new_table.matrix_data.tocsr()
+            child_ids = new_table.ids(axis="observation")
+            row_codes, nodes = np.arange(len(group_nodes)), group_nodes
+        return collapsed
+
+    def _write_tsv(self, fid: TextIO, chunk_size: int) -> None:
+        """
+            Stream the OTU counts table to `fid` in tab separated format
+
+            Parameters
+            ----------
+            fid : TextIO
+                The open text file object to which the table is written
+            chunk_size : int
+                The number of observations that are densified at a time
+        """
+        matrix = self.otu_data.matrix_data.tocsr()
+        obs_ids = self.otu_data.ids(axis="observation")
+        sample_ids = self.otu_data.ids(axis="sample")
+        fid.write("\t".join(["#OTU ID", *map(str, sample_ids)]) + "\n")
+        for start in range(0, matrix.shape[0], chunk_size):
+            stop = start + chunk_size
+            block = matrix[start:stop].toarray()
+            fid.writelines(
+                "\t".join([str(obs_id), *map(str, row)]) + "\n"
+                for obs_id, row in zip(obs_ids[start:stop], block)
+            )
 
     def write(
-        self, base_name: str, fol_path: str = "", file_type: str = "biom"
+        self,
+        base_name: str,
+        fol_path: str = "",
+        file_type: str = "biom",
+        compress: bool = False,
+        chunk_size: int = 1000,
     ) -> None:
         """
             Write Otu instance object to required file_type
@@ -418,9 +1551,18 @@ class Otu:
             fol_path : str, optional
                 The folder where the files are to be written
                 Default is current directory
-            file_type : {'tsv', 'biom'}, optional
+            file_type : {'tsv', 'biom', 'npz'}, optional
                 The type of file data is to be written to
+                'npz' is an uncompressed binary cache of the CSR arrays, ids and
+                metadata columns that is read back by `Otu.load_data(dtype="npz")`
+                without parsing or validating the table again
                 Default is 'biom'
+            compress : bool, optional
+                If True the OTU counts 'tsv' file is written with gzip compression
+                Default is False
+            chunk_size : int, optional
+                The number of observations written at a time to the 'tsv' file
+                Default is 1000
         """
         folder = pathlib.Path(fol_path)
         if not folder.exists():
@@ -430,13 +1572,20 @@ class Otu:
             fpath = str(folder / fname)
             with biom_open(fpath, "w") as fid:
                 self.otu_data.to_hdf5(fid, "Constructed using mindpipe")
+        elif file_type == "npz":
+            _write_npz(
+                self.otu_data, folder / (base_name + ".npz"), self.validation_level
+            )
         elif file_type == "tsv":
             otu_name = base_name + "_otu.tsv"
-            otu_path = folder / otu_name
-            with open(otu_path, "w") as fid:
-                # NOTE: delete header comment from output
-                data = self.otu_data.to_tsv().split("\n", 1)[-1]
-                fid.write(data)
+            if compress:
+                otu_path = folder / (otu_name + ".gz")
+                with gzip.open(otu_path, "wt") as fid:
+                    self._write_tsv(fid, chunk_size)
+            else:
+                otu_path = folder / otu_name
+                with open(otu_path, "w") as fid:
+                    self._write_tsv(fid, chunk_size)
             sample_metadata_name = base_name + "_sample_metadata.tsv"
             sample_metadata_path = folder / sample_metadata_name
             self.sample_metadata.to_csv(sample_metadata_path, sep="\t", index=True)
@@ -444,4 +1593,4 @@ class Otu:
             obs_metadata_path = folder / obs_metadata_name
             self.obs_metadata.to_csv(obs_metadata_path, index=True)
         else:
-            raise ValueError("Supported file types are 'tsv' and 'biom'")
+            raise ValueError("Supported file types are 'tsv', 'biom' and 'npz'")
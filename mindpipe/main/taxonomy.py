@@ -0,0 +1,313 @@
+"""
+    Module that implements a compact, memory mapped index of the NCBI taxonomy
+"""
+
+from hashlib import blake2b
+import json
+import pathlib
+import tarfile
+from typing import Dict, IO, Iterator, List, Tuple
+
+import numpy as np
+
+from .lineage import TaxonomyBackend
+
+
+INDEX_VERSION = 1
+SYNONYM_CLASSES = {
+    "synonym",
+    "equivalent name",
+    "genbank equivalent name",
+    "anamorph",
+    "genbank synonym",
+    "genbank anamorph",
+    "teleomorph",
+}
+
+
+def _name_hash(name: str) -> int:
+    """
+        Get the stable 64 bit hash of the case insensitive taxonomy name
+
+        Parameters
+        ----------
+        name : str
+
+        Returns
+        -------
+        int
+    """
+    digest = blake2b(name.lower().encode("utf8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _split_dmp(fid: IO[bytes]) -> Iterator[List[str]]:
+    """ Split the lines of an open `.dmp` file into their fields """
+    for line in fid:
+        yield [field.strip() for field in line.decode("utf8").split("|")]
+
+
+def _read_dmp(taxdump: pathlib.Path, name: str) -> Iterator[List[str]]:
+    """
+        Read the fields of the lines of an NCBI taxdump `.dmp` file
+
+        Parameters
+        ----------
+        taxdump : pathlib.Path
+            The path to `taxdump.tar.gz` or to the folder containing the `.dmp` files
+        name : str
+            The name of the `.dmp` file
+
+        Yields
+        ------
+        List[str]
+            The fields of a line
+    """
+    if taxdump.is_dir():
+        if not (taxdump / name).exists():
+            raise FileNotFoundError(f"{name} is not present in {taxdump}")
+        with open(taxdump / name, "rb") as fid:
+            yield from _split_dmp(fid)
+    else:
+        with tarfile.open(taxdump, "r:*") as archive:
+            try:
+                fid = archive.extractfile(name)
+            except KeyError:
+                raise FileNotFoundError(f"{name} is not present in {taxdump}")
+            yield from _split_dmp(fid)
+
+
+class TaxonomyIndex(TaxonomyBackend):
+    """
+        Taxonomy backend that reads a compact index built from the NCBI taxdump
+
+        Parameters
+        ----------
+        path : str
+            The folder containing the index built by `TaxonomyIndex.build`
+
+        Notes
+        -----
+        The taxid to parent, rank and name arrays are indexed by taxid and the names
+        are found with a binary search over sorted 64 bit name hashes
+        All arrays are memory mapped so loading the index does not read it
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = pathlib.Path(path)
+        with open(self.path / "index.json") as fid:
+            info = json.load(fid)
+        if info.get("version") != INDEX_VERSION:
+            raise ValueError(f"{self.path} is not a supported taxonomy index")
+        arrays = {
+            name: np.load(self.path / f"{name}.npy", mmap_mode="r")
+            for name in [
+                "parent",
+                "rank",
+                "name_offsets",
+                "name_hashes",
+                "name_taxids",
+                "name_synonym",
+                "merged_from",
+                "merged_to",
+            ]
+        }
+        self._parent = arrays["parent"]
+        self._rank = arrays["rank"]
+        self._name_offsets = arrays["name_offsets"]
+        self._name_hashes = arrays["name_hashes"]
+        self._name_taxids = arrays["name_taxids"]
+        self._name_synonym = arrays["name_synonym"]
+        self._merged_from = arrays["merged_from"]
+        self._merged_to = arrays["merged_to"]
+        self._names = np.memmap(self.path / "names.bin", dtype=np.uint8, mode="r")
+        self._ranks: List[str] = info["ranks"]
+
+    @classmethod
+    def build(cls, taxdump: str, path: str) -> "TaxonomyIndex":
+        """
+            Build the index from the NCBI taxdump
+
+            Parameters
+            ----------
+            taxdump : str
+                The path to `taxdump.tar.gz` or to the folder containing the `.dmp` files
+            path : str
+                The folder where the index is written
+
+            Returns
+            -------
+            TaxonomyIndex
+                The index that was built
+        """
+        taxdump_path = pathlib.Path(taxdump)
+        folder = pathlib.Path(path)
+        folder.mkdir(parents=True, exist_ok=True)
+        nodes = [
+            (int(fields[0]), int(fields[1]), fields[2])
+            for fields in _read_dmp(taxdump_path, "nodes.dmp")
+        ]
+        size = max(taxid for taxid, *_ in nodes) + 1
+        ranks = sorted({rank for *_, rank in nodes})
+        rank_codes = {rank: code for code, rank in enumerate(ranks)}
+        parent = np.full(size, -1, dtype=np.int32)
+        rank = np.zeros(size, dtype=np.uint8)
+        for taxid, parent_taxid, rank_name in nodes:
+            parent[taxid] = parent_taxid
+            rank[taxid] = rank_codes[rank_name]
+        sci_names: Dict[int, str] = dict()
+        synonyms: Dict[Tuple[int, str], str] = dict()
+        for fields in _read_dmp(taxdump_path, "names.dmp"):
+            taxid, name, name_class = int(fields[0]), fields[1], fields[3].lower()
+            # NOTE: quotes are stripped from the names like ete3 does
+            name = name.strip('"')
+            if name_class == "scientific name":
+                sci_names[taxid] = name
+            elif name_class in SYNONYM_CLASSES:
+                # NOTE: synonyms that only differ in case are kept once like ete3 does
+                synonyms.setdefault((taxid, name.lower()), name)
+        encoded = [sci_names.get(taxid, "").encode("utf8") for taxid in range(size)]
+        name_offsets = np.zeros(size + 1, dtype=np.int64)
+        name_offsets[1:] = np.cumsum([len(name) for name in encoded])
+        with open(folder / "names.bin", "wb") as fid:
+            fid.writelines(encoded)
+        name_entries = [(name, taxid, False) for taxid, name in sci_names.items()]
+        name_entries.extend(
+            (name, taxid, True) for (taxid, _), name in sorted(synonyms.items())
+        )
+        name_hashes = np.array(
+            [_name_hash(name) for name, *_ in name_entries], dtype=np.uint64
+        )
+        order = np.argsort(name_hashes, kind="stable")
+        try:
+            merged = [
+                (int(fields[0]), int(fields[1]))
+                for fields in _read_dmp(taxdump_path, "merged.dmp")
+            ]
+        except FileNotFoundError:
+            merged = []
+        merged_arr = np.array(sorted(merged), dtype=np.int32).reshape(-1, 2)
+        arrays = {
+            "parent": parent,
+            "rank": rank,
+            "name_offsets": name_offsets,
+            "name_hashes": name_hashes[order],
+            "name_taxids": np.array(
+                [taxid for _, taxid, _ in name_entries], dtype=np.int32
+            )[order],
+            "name_synonym": np.array(
+                [synonym for *_, synonym in name_entries], dtype=bool
+            )[order],
+            "merged_from": merged_arr[:, 0],
+            "merged_to": merged_arr[:, 1],
+        }
+        for name, array in arrays.items():
+            np.save(folder / f"{name}.npy", array)
+        with open(folder / "index.json", "w") as fid:
+            json.dump({"version": INDEX_VERSION, "ranks": ranks}, fid)
+        return cls(str(folder))
+
+    def _translate_taxid(self, taxid: int) -> int:
+        """ Replace the taxid by its current taxid if it was merged into another """
+        ind = np.searchsorted(self._merged_from, taxid)
+        if ind < len(self._merged_from) and self._merged_from[ind] == taxid:
+            return int(self._merged_to[ind])
+        return taxid
+
+    def _exists(self, taxid: int) -> bool:
+        """ Check whether the taxid is present in the index """
+        return 0 <= taxid < len(self._parent) and self._parent[taxid] != -1
+
+    def _sci_name(self, taxid: int) -> str:
+        """ Get the scientific name of the taxid """
+        start, end = self._name_offsets[taxid], self._name_offsets[taxid + 1]
+        return self._names[start:end].tobytes().decode("utf8")
+
+    def get_name_translator(self, names: List[str]) -> Dict[str, List[int]]:
+        """
+            Map each taxonomy name to the list of its taxids
+
+            Parameters
+            ----------
+            names : List[str]
+                The taxonomy names, matched case insensitively
+
+            Returns
+            -------
+            Dict[str, List[int]]
+                The names that were found mapped to their taxids
+                Synonyms are only used for names without a matching scientific name
+        """
+        name2id: Dict[str, List[int]] = dict()
+        for name in names:
+            name_hash = np.uint64(_name_hash(name))
+            start = np.searchsorted(self._name_hashes, name_hash, side="left")
+            end = np.searchsorted(self._name_hashes, name_hash, side="right")
+            taxids = self._name_taxids[start:end]
+            synonym = self._name_synonym[start:end]
+            sci_taxids = [
+                int(taxid)
+                for taxid in taxids[~synonym]
+                if self._sci_name(int(taxid)).lower() == name.lower()
+            ]
+            found = sci_taxids or [int(taxid) for taxid in taxids[synonym]]
+            if found:
+                name2id[name] = found
+        return name2id
+
+    def get_lineage(self, taxid: int) -> List[int]:
+        """
+            Get the taxids of the lineage of `taxid` from the root
+
+            Parameters
+            ----------
+            taxid : int
+
+            Returns
+            -------
+            List[int]
+        """
+        taxid = self._translate_taxid(int(taxid))
+        if not self._exists(taxid):
+            raise ValueError(f"{taxid} taxid not found")
+        lineage = [taxid]
+        while self._parent[taxid] != taxid:
+            taxid = int(self._parent[taxid])
+            lineage.append(taxid)
+        return lineage[::-1]
+
+    def get_taxid_translator(self, taxids: List[int]) -> Dict[int, str]:
+        """
+            Map each taxid to its scientific name
+
+            Parameters
+            ----------
+            taxids : List[int]
+
+            Returns
+            -------
+            Dict[int, str]
+        """
+        translated = (self._translate_taxid(int(taxid)) for taxid in taxids)
+        return {
+            taxid: self._sci_name(taxid) for taxid in translated if self._exists(taxid)
+        }
+
+    def get_rank(self, taxids: List[int]) -> Dict[int, str]:
+        """
+            Map each taxid to its rank
+
+            Parameters
+            ----------
+            taxids : List[int]
+
+            Returns
+            -------
+            Dict[int, str]
+        """
+        translated = (self._translate_taxid(int(taxid)) for taxid in taxids)
+        return {
+            taxid: self._ranks[self._rank[taxid]]
+            for taxid in translated
+            if self._exists(taxid)
+        }
@@ -2,6 +2,7 @@
 
 def output_dir = file(params.output_dir)
 def otudata = params.otudata
+def validation_level = params.validation_level
 
 
 Channel
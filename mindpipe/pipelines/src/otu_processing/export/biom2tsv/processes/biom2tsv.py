@@ -3,12 +3,15 @@
 from mindpipe import Otu
 
 
-def main(biom_file, base_name):
-    otu_biom = Otu.load_data(biom_file)
+def main(biom_file, base_name, validation_level):
+    # NOTE: npz caches of an upstream step skip the checks they already passed
+    dtype = "npz" if biom_file.endswith(".npz") else "biom"
+    otu_biom = Otu.load_data(biom_file, dtype=dtype, validation_level=validation_level)
     otu_biom.write(base_name=base_name, file_type="tsv")
 
 
 if __name__ == "__main__":
     BIOM_FILE = "$otu_file"
     BASE_NAME = "$level"
-    main(BIOM_FILE, BASE_NAME)
+    VALIDATION_LEVEL = "$validation_level"
+    main(BIOM_FILE, BASE_NAME, VALIDATION_LEVEL)
@@ -27,6 +27,7 @@ process filter {
     set val(id), file(otu_file) from chnl_otudata
     output:
     set val(id), file("*_filtered.biom") into chnl_output
+    set val(id), file("*_validation_timings.json") into chnl_timings
     script:
     {{ filter }}
 }
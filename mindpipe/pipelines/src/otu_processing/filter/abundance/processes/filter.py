@@ -2,17 +2,21 @@
 
 # Script that filters samples and observations based on abundance
 
+import json
 import os
 
 from mindpipe import Otu
 
 
 def main(otu_file, count_thres, prevalence_thres, abundance_thres):
-    otu_data = Otu.load_data(otu_file)
+    # NOTE: this is the ingest step so the input is fully validated once
+    otu_data = Otu.load_data(otu_file, validation_level="full")
+    fname, _ = os.path.splitext(otu_file)
+    with open(f"{fname}_validation_timings.json", "w") as fid:
+        json.dump(otu_data.validation_timings, fid, indent=2, sort_keys=True)
     filtered_otu_data = otu_data.rm_sparse_obs(
         prevalence_thres, abundance_thres
     ).rm_sparse_samples(count_thres)
-    fname, _ = os.path.splitext(otu_file)
     filtered_otu_data.write(f"{fname}_filtered", file_type="biom")
 
 
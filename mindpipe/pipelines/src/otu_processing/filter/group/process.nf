@@ -4,6 +4,7 @@ def output_dir = file(params.output_dir)
 def otu_table = params.otu_table
 
 def tax_levels = params.tax_levels
+def validation_level = params.validation_level
 
 Channel
     .fromPath(otu_table)
@@ -10,17 +10,16 @@ from mindpipe import Otu, Lineage
 
 # Group the otu_data on all the tax_levels
 def grp_otu_data(otu_data: Otu, tax_levels: List[str]) -> Iterable[Tuple[Otu, dict]]:
-    sorted_tax_levels = list(reversed(tax_levels))
-    child_otu = otu_data
-    for tax_level in sorted_tax_levels:
-        child_otu, child_groups = child_otu.collapse_taxa(tax_level)
-        yield child_otu, child_groups
+    yield from otu_data.collapse_taxa_levels(tax_levels).values()
 
 
 if __name__ == "__main__":
     TAX_LEVELS: List[str] = $tax_levels  # ['Family', 'Genus', 'Species']
     OTU_FILE = "$otu_file"  # "otu.biom"
-    otu_data = Otu.load_data(OTU_FILE)
+    VALIDATION_LEVEL = "$validation_level"  # "full"
+    # NOTE: npz caches of an upstream step skip the checks they already passed
+    DTYPE = "npz" if OTU_FILE.endswith(".npz") else "biom"
+    otu_data = Otu.load_data(OTU_FILE, dtype=DTYPE, validation_level=VALIDATION_LEVEL)
     for child_otu, child_groups in grp_otu_data(otu_data, TAX_LEVELS):
         fname = child_otu.tax_level + "_level"
         child_otu.write(fname, file_type="biom")
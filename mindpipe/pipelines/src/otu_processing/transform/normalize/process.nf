@@ -4,11 +4,15 @@ def output_dir = file(params.output_dir)
 def otudata = params.otudata
 
 def axis = params.axis
+def method = params.method
+def depth = params.depth
+def quantile = params.quantile
 def count_thres = params.count_thres
 def prevalence_thres = params.prevalence_thres
 def abundance_thres = params.abundance_thres
 def rm_sparse_obs = params.rm_sparse_obs
 def rm_sparse_samples = params.rm_sparse_samples
+def validation_level = params.validation_level
 
 Channel
     .fromPath(otudata)
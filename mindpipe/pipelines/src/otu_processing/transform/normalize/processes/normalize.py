@@ -5,26 +5,39 @@ from mindpipe import Otu
 
 def main(
     otu_file: str,
+    validation_level: str,
     rm_sparse_samples: bool,
     rm_sparse_obs: bool,
     axis: str,
+    method: str,
+    depth: int,
+    quantile: float,
     count_thres: int,
     prevalence_thres: float,
     abundance_thres: float,
 ) -> Otu:
-    otu = Otu.load_data(otu_file)
+    # NOTE: npz caches of an upstream step skip the checks they already passed
+    dtype = "npz" if otu_file.endswith(".npz") else "biom"
+    otu = Otu.load_data(otu_file, dtype=dtype, validation_level=validation_level)
     if rm_sparse_samples:
         otu = otu.rm_sparse_samples(count_thres=count_thres)
     if rm_sparse_obs:
         otu = otu.rm_sparse_obs(
             prevalence_thres=prevalence_thres, abundance_thres=abundance_thres
         )
-    return otu.normalize(axis=axis)
+    # NOTE: a rarefaction depth of 0 means the depth of the shallowest sample with reads
+    return otu.normalize(
+        axis=axis, method=method, depth=depth or None, quantile=quantile
+    )
 
 
 if __name__ == "__main__":
     OTU_FILE = "$otu_file"
+    VALIDATION_LEVEL = "$validation_level"
     AXIS = "$axis"
+    METHOD = "$method"
+    DEPTH = int("$depth")
+    QUANTILE = float("$quantile")
     RM_SPARSE_SAMPLES = $rm_sparse_samples
     COUNT_THRES = $count_thres
     RM_SPARSE_OBS = $rm_sparse_obs
@@ -32,9 +45,13 @@ if __name__ == "__main__":
     ABUNDANCE_THRES = $abundance_thres
     norm_otu = main(
         OTU_FILE,
+        VALIDATION_LEVEL,
         RM_SPARSE_SAMPLES,
         RM_SPARSE_OBS,
         AXIS,
+        METHOD,
+        DEPTH,
+        QUANTILE,
         COUNT_THRES,
         PREVALENCE_THRES,
         ABUNDANCE_THRES,
@@ -10,14 +10,34 @@ import pandas as pd
 HEADERS = ["Kingdom", "Phylum", "Class", "Order", "Family", "Genus", "Species"]
 
 
-def tax_splitter(full_tax):
-    tax_list = [tax.strip().split("__")[-1] for tax in full_tax.Taxon.split(";")]
-    tax_list = [
-        t.replace("'", "").replace("=", "").replace("[", "").replace("]", "")
-        for t in tax_list
-    ]
-    tax_list.extend([""] * (len(HEADERS) - len(tax_list)))
-    return pd.Series(data=tax_list, index=HEADERS)
+def tax_splitter(taxa):
+    # NOTE: identical taxon strings are only split once
+    codes, uniques = pd.factorize(taxa)
+    if (codes == -1).any():
+        raise ValueError("Missing taxon string in the taxonomy assignment")
+    levels = pd.Series(uniques, dtype=object).str.split(";", expand=True)
+    if len(levels.columns) > len(HEADERS):
+        raise ValueError(f"Taxon strings can have at most {len(HEADERS)} levels")
+    tax_levels = {}
+    for ind, header in enumerate(HEADERS):
+        if ind not in levels.columns:
+            tax_levels[header] = ""
+            continue
+        tax_levels[header] = (
+            levels[ind]
+            .str.strip()
+            .str.split("__")
+            .str[-1]
+            .str.replace("'", "", regex=False)
+            .str.replace("=", "", regex=False)
+            .str.replace("[", "", regex=False)
+            .str.replace("]", "", regex=False)
+            .fillna("")
+        )
+    tax_data = pd.DataFrame(tax_levels, index=levels.index, columns=HEADERS)
+    tax_data = tax_data.take(codes)
+    tax_data.index = taxa.index
+    return tax_data
 
 
 def main(otu_table_file, tax_assignment_file, sample_metadata_file):
@@ -27,7 +47,7 @@ def main(otu_table_file, tax_assignment_file, sample_metadata_file):
     else:
         sample_metadata = pd.read_table(sample_metadata_file, index_col=0)
     tax_assignment = pd.read_table(tax_assignment_file, index_col=0)
-    obs_metadata = tax_assignment[["Taxon"]].apply(tax_splitter, axis=1)
+    obs_metadata = tax_splitter(tax_assignment["Taxon"])
     for index in otu_table.ids("observation"):
         if index not in obs_metadata.index:
             obs_metadata.loc[index] = [""] * len(HEADERS)
@@ -7,6 +7,8 @@ from .network_schema import (
     ChildrenmapType,
     NodesModel,
     LinksModel,
+    NodetableType,
+    LinkarraysType,
     NetworkmetadataModel,
     ElistType,
 )
@@ -2,6 +2,8 @@
     Module that defines the schema for interactions, pvalues, networks and their metadata
 """
 
+from itertools import chain
+
 import numpy as np
 import pandas as pd
 from schematics.exceptions import ValidationError
@@ -159,6 +161,111 @@ class LinksModel(Model):
     links = ListType(ModelType(LinkModel), required=True)
 
 
+class NodetableType(BaseType):
+    """
+        DataType that describes the expected structure of the node table of a network
+
+        Notes
+        -----
+        This checks the same constraints as `NodeModel` one column at a time
+    """
+
+    columns = ["id", "lineage", "name", "taxid", "taxlevel", "abundance", "children"]
+    taxlevels = ["Kingdom", "Phylum", "Class", "Order", "Family", "Genus", "Species"]
+
+    @staticmethod
+    def _is_str(column):
+        return column.map(lambda elem: isinstance(elem, str)).all()
+
+    def validate_isdataframe(self, value):
+        """ Check whether the object is a pandas DataFrame with the node columns """
+        if not isinstance(value, pd.DataFrame):
+            raise ValidationError("Node table must be a `pd.DataFrame` instance")
+        if list(value.columns) != self.columns:
+            raise ValidationError(f"Node table must have the columns {self.columns}")
+
+    def validate_strings(self, value):
+        """ Check whether the ids, lineages and names are strings """
+        for column in ["id", "lineage", "name"]:
+            if not self._is_str(value[column]):
+                raise ValidationError(f"Node {column} must be a string")
+        if (value["id"].str.len() < 2).any():
+            raise ValidationError("Node id must be at least 2 characters long")
+
+    def validate_taxonomy(self, value):
+        """ Check whether the taxids are integers and the taxlevels are known """
+        taxids = pd.to_numeric(value["taxid"], errors="coerce").astype(float)
+        if taxids.isna().any() or (taxids != np.floor(taxids)).any():
+            raise ValidationError("Node taxid must be an integer")
+        if not value["taxlevel"].isin(self.taxlevels).all():
+            raise ValidationError(f"Node taxlevel must be one of {self.taxlevels}")
+
+    def validate_abundance(self, value):
+        """ Check whether the abundances are numbers or missing """
+        abundance = value["abundance"]
+        numeric = pd.to_numeric(abundance, errors="coerce")
+        if (numeric.isna() & abundance.notna()).any():
+            raise ValidationError("Node abundance must be a float")
+
+    def validate_children(self, value):
+        """ Check whether the children are lists of strings """
+        children = value["children"]
+        if not children.map(lambda elem: isinstance(elem, list)).all():
+            raise ValidationError("Node children must be a list of strings")
+        if not all(isinstance(child, str) for child in chain.from_iterable(children)):
+            raise ValidationError("Node children must be a list of strings")
+
+
+class LinkarraysType(BaseType):
+    """
+        DataType that describes the expected structure of the link arrays of a network
+
+        Parameters
+        ----------
+        n_nodes : int
+            The number of nodes that the source and target indices refer to
+
+        Notes
+        -----
+        This checks the same constraints as `LinkModel` on whole arrays
+    """
+
+    fields = ["source", "target", "weight", "pvalue"]
+
+    def __init__(self, n_nodes, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.n_nodes = n_nodes
+
+    def validate_arrays(self, value):
+        """ Check whether the links are arrays of the same length """
+        if not all(
+            isinstance(getattr(value, f, None), np.ndarray) for f in self.fields
+        ):
+            raise ValidationError(f"Links must have the array fields {self.fields}")
+        if len({len(getattr(value, field)) for field in self.fields}) > 1:
+            raise ValidationError("Link arrays must have the same length")
+
+    def validate_nodes(self, value):
+        """ Check whether the sources and targets are indices of nodes """
+        for field in ["source", "target"]:
+            inds = getattr(value, field)
+            if not np.issubdtype(inds.dtype, np.integer):
+                raise ValidationError(f"Link {field} must be an array of node indices")
+            if len(inds) and (inds.min() < 0 or inds.max() >= self.n_nodes):
+                raise ValidationError(f"Link {field} must be an index of a node")
+
+    def validate_weight(self, value):
+        """ Check whether the weights are finite """
+        if not np.isfinite(value.weight).all():
+            raise ValidationError("Link weight must be a finite float")
+
+    def validate_pvalue(self, value):
+        """ Check whether the pvalues are missing or bound by 0 and 1 """
+        pvalue = value.pvalue[~np.isnan(value.pvalue)]
+        if (pvalue < 0).any() or (pvalue > 1).any():
+            raise ValidationError("Link pvalue must be bound by 0 and 1")
+
+
 class NetworkmetadataModel(MetadataModel):
     """ Model that describes the expected structure of the network metadata """
 
@@ -2,12 +2,20 @@
     Module that defines the schema for a valid OTU table
 """
 
+import re
+import time
+from typing import Callable, Dict, List
+
 from biom import Table
 import numpy as np
-from schematics.exceptions import ValidationError
+import pandas as pd
+from schematics.exceptions import StopValidationError, ValidationError
 from schematics.types import BaseType
 
 
+TAXA_NAME_PATTERN = re.compile(r"^[a-zA-Z0-9-._ ]+(?<! )$")
+
+
 class HeaderType(BaseType):
     """
         DataType that describes the expected structure and format for the sample headers
@@ -43,13 +51,16 @@ class DataType(BaseType):
             raise ValidationError("Invalid data. Abundances must be float64")
 
     def validate_data_range(self, value):
-        df = value.to_dataframe(dense=True)
-        if df.values.min() < 0:
+        # NOTE: only the stored entries can be nonzero so the dense table is not needed
+        matrix = value.matrix_data
+        data = matrix.data
+        if data.size and data.min() < 0:
             raise ValidationError("Invalid data. Abundances cannot be negative")
         if self.norm:
-            if df.values.max() > 1 or df.values.min() < 0:
+            if data.size and data.max() > 1:
                 raise ValidationError("Invalid data. Abundances are not normalized")
-            if any(not np.isclose(v, 1.0) for v in df.values.sum(axis=0)):
+            col_sums = np.asarray(matrix.sum(axis=0)).ravel()
+            if not np.isclose(col_sums, 1.0).all():
                 raise ValidationError("Invalid data. Abundances are not normalized")
 
 
@@ -76,11 +87,29 @@ class SamplemetaType(BaseType):
 
 
 class ObsmetaType(BaseType):
-    """ DataType that describes the expected structure and format for the observation metadata """
+    """
+        DataType that describes the expected structure and format for the observation metadata
+
+        Parameters
+        ----------
+        strict : bool, optional
+            If True taxonomy names that are not standard raise a `ValidationError`
+            Default value is False
+
+        Attributes
+        ----------
+        report : Dict[str, List[str]]
+            The non standard taxonomy names of every level found by the last validation
+    """
 
     _req_keys = ["Kingdom", "Phylum", "Class", "Order", "Family", "Genus", "Species"]
     _extra_key = "Confidence"
 
+    def __init__(self, strict=False, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.strict = strict
+        self.report: Dict[str, List[str]] = dict()
+
     def validate_index(self, value):
         if any(not isinstance(v, str) for v in value.index):
             raise ValidationError("Invalid index. All indices must be strings")
@@ -122,26 +151,44 @@ class ObsmetaType(BaseType):
             df = value.drop(self._extra_key, axis=1)
         else:
             df = value
-        for level, data in df.items():
-            filt_data = data[data != ""]
-            if level == "Species":
-                query = filt_data[
-                    ~filt_data.str.contains(r"^[a-zA-Z0-9-._ ]+(?<! )$")
-                ].any()
-                # if query:
-                #     raise ValidationError(
-                #         "Invalid observation metadata. "
-                #         f"Taxonomy names are not standard: {query} is not allowed in {level}"
-                #     )
-            else:
-                query = filt_data[
-                    ~filt_data.str.contains(r"^[a-zA-Z0-9-._ ]+(?<! )$")
-                ].any()
-                # if query:
-                #     raise ValidationError(
-                #         "Invalid observation metadata. "
-                #         f"Taxonomy names are not standard: {query} is not allowed in {level}"
-                #     )
+        self.report = self.check_taxa_names(df)
+        if self.strict and self.report:
+            invalid = "; ".join(
+                f"{level}: {', '.join(map(str, names))}"
+                for level, names in self.report.items()
+            )
+            raise ValidationError(
+                f"Invalid observation metadata. Taxonomy names are not standard: {invalid}"
+            )
+
+    @staticmethod
+    def check_taxa_names(value: pd.DataFrame) -> Dict[str, List[str]]:
+        """
+            Find the taxonomy names that do not match `TAXA_NAME_PATTERN`
+
+            Parameters
+            ----------
+            value : pd.DataFrame
+                The observation metadata with one column per taxonomy level
+
+            Returns
+            -------
+            Dict[str, List[str]]
+                The offending names of every level that has any
+        """
+        report = dict()
+        for level, data in value.items():
+            # NOTE: the names are repeated across observations so only unique ones are matched
+            names = pd.unique(data.dropna())
+            invalid = [
+                name
+                for name in names
+                if name != ""
+                and not (isinstance(name, str) and TAXA_NAME_PATTERN.match(name))
+            ]
+            if invalid:
+                report[level] = invalid
+        return report
 
 
 class BiomType(BaseType):
@@ -153,16 +200,68 @@ class BiomType(BaseType):
         norm : bool, optional
             True if abundances are normalized
             Default value is False
+        level : {'full', 'structural', 'none'}, optional
+            The validation level
+            'structural' only checks the type, the sample ids and the observation ids
+            'none' skips all checks
+            Default value is 'full'
+        strict_taxa : bool, optional
+            If True taxonomy names that are not standard raise a `ValidationError`
+            Default value is False
+
+        Attributes
+        ----------
+        timings : Dict[str, float]
+            The time in seconds taken by each check during the last validation
+        taxa_report : Dict[str, List[str]]
+            The non standard taxonomy names of every level found by the last validation
     """
 
-    def __init__(self, norm=False, *args, **kwargs):
+    levels = {
+        "none": [],
+        "structural": ["validate_istable", "validate_samples", "validate_index"],
+        "full": [
+            "validate_istable",
+            "validate_samples",
+            "validate_index",
+            "validate_data",
+            "validate_sample_metadata",
+            "validate_obs_metadata",
+        ],
+    }
+
+    def __init__(self, norm=False, level="full", strict_taxa=False, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        if level not in self.levels:
+            raise ValueError(f"Validation level must be one of {list(self.levels)}")
         self.norm = norm
+        self.level = level
+        self.strict_taxa = strict_taxa
+        self.validators = [self._timed(name) for name in self.levels[level]]
+        self.timings: Dict[str, float] = dict()
+        self.taxa_report: Dict[str, List[str]] = dict()
+
+    def _timed(self, name: str) -> Callable:
+        """ Wrap the validator `name` so that its run time is recorded """
+        validator = getattr(self, name)
+
+        def timed_validator(value, context=None):
+            start = time.perf_counter()
+            try:
+                return validator(value, context)
+            finally:
+                self.timings[name] = time.perf_counter() - start
+
+        return timed_validator
+
+    def validate(self, value, context=None):
+        self.timings.clear()
+        return super().validate(value, context)
 
     def validate_istable(self, value):
         """ Check whether the object is a `biom.Table` """
         if not isinstance(value, Table):
-            raise ValidationError("Object must be a `biom.Table` instance")
+            raise StopValidationError("Object must be a `biom.Table` instance")
 
     def validate_samples(self, value):
         """ Check whether the samples (columns) of the Table are valid """
@@ -187,6 +286,9 @@ class BiomType(BaseType):
 
     def validate_obs_metadata(self, value):
         """ Check whether the observation metadata in the Table is valid """
-        obsmeta_type = ObsmetaType()
+        obsmeta_type = ObsmetaType(strict=self.strict_taxa)
         obs_metadata = value.metadata_to_dataframe("observation")
-        obsmeta_type.validate(obs_metadata)
+        try:
+            obsmeta_type.validate(obs_metadata)
+        finally:
+            self.taxa_report = obsmeta_type.report
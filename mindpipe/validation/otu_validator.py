@@ -3,10 +3,12 @@
 """
 
 import pathlib
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterable, List, Optional, Union
 
+import h5py
 import pandas as pd
 from biom import load_table, Table
+from biom.util import biom_open
 
 from .otu_schema import BiomType, SamplemetaType, ObsmetaType
 
@@ -24,6 +26,10 @@ class OtuValidator:
             Supported extensions:
             'tsv' dtype: 'tsv', 'txt', 'counts'
             'biom' dtype: 'biom', 'hdf5'
+        validation_level : {'full', 'structural', 'none'}, optional
+            The level of validation applied to the loaded table
+            Use 'full' for external input and 'structural' for tables written by mindpipe
+            Default is 'full'
 
         Attributes
         ----------
@@ -31,6 +37,8 @@ class OtuValidator:
             Dictionary showing the current configuration of the instance
         validator : BiomType
             The schmatics validator instance
+        timings : Dict[str, float]
+            The time in seconds taken by each check during the last validation
 
         Raises
         ------
@@ -46,7 +54,9 @@ class OtuValidator:
     _meta_exts = [".csv", ".tsv"]
     _tax_exts = [".csv", ".tsv"]
 
-    def __init__(self, dtype: str, ext: Optional[str] = None) -> None:
+    def __init__(
+        self, dtype: str, ext: Optional[str] = None, validation_level: str = "full"
+    ) -> None:
         self._dtype = dtype
         if dtype not in self._otu_exts.keys():
             raise TypeError(
@@ -54,7 +64,7 @@ class OtuValidator:
             )
         if ext:
             self._otu_exts[self._dtype].append(ext)
-        self.validator = BiomType()
+        self.validator = BiomType(level=validation_level)
 
     @property
     def configuration(self) -> Dict[str, Union[str, List[str]]]:
@@ -67,11 +77,23 @@ class OtuValidator:
         """
         return {
             "dtype": self._dtype,
+            "validation_level": self.validator.level,
             "valid_otu_ext": self._otu_exts[self._dtype],
             "valid_meta_ext": self._meta_exts,
             "valid_tax_ext": self._tax_exts,
         }
 
+    @property
+    def timings(self) -> Dict[str, float]:
+        """
+            The time in seconds taken by each check during the last validation
+
+            Returns
+            -------
+            Dict[str, float]
+        """
+        return dict(self.validator.timings)
+
     def _validate_ext(self, fpath: pathlib.Path) -> bool:
         """
             Determines whether the filetype is supported
@@ -87,7 +109,12 @@ class OtuValidator:
         exts = self._otu_exts[self._dtype]
         return bool(fpath.suffix in exts)
 
-    def _load_from_biom(self, otu_file: pathlib.Path) -> Table:
+    def _load_from_biom(
+        self,
+        otu_file: pathlib.Path,
+        subset: Optional[Iterable[str]] = None,
+        subset_axis: str = "sample",
+    ) -> Table:
         """
             Read biom table from file
 
@@ -95,16 +122,108 @@ class OtuValidator:
             ----------
             otu_file : pathlib.Path
                 The path to the OTU file in `biom` format
+            subset : Iterable[str], optional
+                The ids of the samples or observations to load
+                Only the corresponding slices of the `HDF5` matrix are read
+            subset_axis : {'sample', 'observation'}, optional
+                The axis of the `subset` ids
+                Default is 'sample'
 
             Returns
             -------
             Table
                 A `biom.Table` instance containing the OTU, meta, tax data
         """
-        otudata = load_table(otu_file)
+        if subset is None:
+            otudata = load_table(otu_file)
+        elif h5py.is_hdf5(str(otu_file)):
+            subset = list(subset)
+            self._check_subset(self.load_ids(otu_file, subset_axis), subset)
+            with biom_open(str(otu_file)) as fid:
+                otudata = Table.from_hdf5(fid, ids=subset, axis=subset_axis)
+        else:
+            otudata = self.subset_table(load_table(otu_file), subset, subset_axis)
         self.validator.validate(otudata)
         return otudata
 
+    @staticmethod
+    def _check_subset(ids: Iterable[str], subset: List[str]) -> None:
+        """
+            Check whether all the `subset` ids are present in `ids`
+
+            Parameters
+            ----------
+            ids : Iterable[str]
+                The ids of the table along the axis of the subset
+            subset : List[str]
+                The ids of the subset
+        """
+        missing = set(subset).difference(ids)
+        if missing:
+            raise ValueError(
+                f"Subset ids {sorted(missing)} are not present in the table"
+            )
+
+    @classmethod
+    def subset_table(
+        cls, otu_table: Table, subset: Iterable[str], subset_axis: str = "sample"
+    ) -> Table:
+        """
+            Keep only the `subset` ids of a table in place
+
+            Parameters
+            ----------
+            otu_table : Table
+                The table to be subset
+            subset : Iterable[str]
+                The ids of the samples or observations to keep
+            subset_axis : {'sample', 'observation'}, optional
+                The axis of the `subset` ids
+                Default is 'sample'
+
+            Returns
+            -------
+            Table
+                The subset table
+
+            Notes
+            -----
+            The rows of the other axis that are empty in the subset are removed
+            This matches the subsets read from `HDF5` files by `Table.from_hdf5`
+        """
+        subset = list(subset)
+        cls._check_subset(otu_table.ids(axis=subset_axis), subset)
+        otu_table.filter(subset, axis=subset_axis, inplace=True)
+        other_axis = "observation" if subset_axis == "sample" else "sample"
+        otu_table.remove_empty(axis=other_axis, inplace=True)
+        return otu_table
+
+    @staticmethod
+    def load_ids(otu_file: pathlib.Path, axis: str = "sample") -> List[str]:
+        """
+            Read only the ids of a `biom` file without loading the counts
+
+            Parameters
+            ----------
+            otu_file : pathlib.Path
+                The path to the OTU file in `biom` format
+            axis : {'sample', 'observation'}, optional
+                The axis whose ids are read
+                Default is 'sample'
+
+            Returns
+            -------
+            List[str]
+                The ids along `axis`
+        """
+        if axis not in {"sample", "observation"}:
+            raise ValueError("Axis must of either {'sample' or 'observation'}")
+        if not h5py.is_hdf5(str(otu_file)):
+            return list(load_table(otu_file).ids(axis=axis))
+        with h5py.File(str(otu_file), "r") as fid:
+            ids = fid[axis]["ids"][:]
+        return [i.decode("utf8") if isinstance(i, bytes) else str(i) for i in ids]
+
     @staticmethod
     def _extract_data(data_file: pathlib.Path, valid_exts: List[str]) -> pd.DataFrame:
         """
@@ -162,12 +281,13 @@ class OtuValidator:
         otudata = load_table(otu_file)
         metadata = self._extract_data(meta_file, self._meta_exts)
         metadata.index = metadata.index.astype(str)
-        samplemeta_type = SamplemetaType()
-        samplemeta_type.validate(metadata)
         taxdata = self._extract_data(tax_file, self._tax_exts)
         taxdata.index = taxdata.index.astype(str)
-        obsmeta_type = ObsmetaType()
-        obsmeta_type.validate(taxdata)
+        if self.validator.level == "full":
+            samplemeta_type = SamplemetaType()
+            samplemeta_type.validate(metadata)
+            obsmeta_type = ObsmetaType()
+            obsmeta_type.validate(taxdata)
         otudata.add_metadata(metadata.to_dict(orient="index"), axis="sample")
         otudata.add_metadata(taxdata.to_dict(orient="index"), axis="observation")
         self.validator.validate(otudata)
@@ -178,6 +298,8 @@ class OtuValidator:
         otu_file: pathlib.Path,
         meta_file: Optional[pathlib.Path] = None,
         tax_file: Optional[pathlib.Path] = None,
+        subset: Optional[Iterable[str]] = None,
+        subset_axis: str = "sample",
     ) -> Table:
         """
             Load the data and validate
@@ -192,6 +314,13 @@ class OtuValidator:
             tax_file : pathlib.Path, optional
                 The path to the taxonomy file
                 This argument is required if `dtype` is 'tsv'
+            subset : Iterable[str], optional
+                The ids of the samples or observations to load
+                For `HDF5` biom files only the required slices are read from disk
+                The rows of the other axis that are empty in the subset are removed
+            subset_axis : {'sample', 'observation'}, optional
+                The axis of the `subset` ids
+                Default is 'sample'
 
             Returns
             -------
@@ -204,13 +333,15 @@ class OtuValidator:
         )
         if self._dtype == "biom":
             if self._validate_ext(otu_file):
-                otu_table = self._load_from_biom(otu_file)
+                otu_table = self._load_from_biom(otu_file, subset, subset_axis)
             else:
                 raise ValueError(err_msg)
         elif self._dtype == "tsv":
             if meta_file and tax_file:
                 if self._validate_ext(otu_file):
                     otu_table = self._load_from_tsv(otu_file, meta_file, tax_file)
+                    if subset is not None:
+                        self.subset_table(otu_table, subset, subset_axis)
                 else:
                     raise TypeError(err_msg)
             else:
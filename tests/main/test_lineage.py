@@ -2,9 +2,32 @@
     Module containing tests for the lineage class
 """
 
+import pandas as pd
 import pytest
 
 from mindpipe.main import Lineage
+from mindpipe.main.lineage import (
+    LineageTree,
+    TaxonomyBackend,
+    get_taxonomy_backend,
+    set_taxonomy_backend,
+)
+
+
+class StubBackend(TaxonomyBackend):
+    """ Taxonomy backend that knows a single genus """
+
+    def get_name_translator(self, names):
+        return {name: [561] for name in names if name == "Escherichia"}
+
+    def get_lineage(self, taxid):
+        return [2, 561]
+
+    def get_taxid_translator(self, taxids):
+        return {2: "Bacteria", 561: "Escherichia"}
+
+    def get_rank(self, taxids):
+        return {2: "superkingdom", 561: "genus"}
 
 
 @pytest.mark.usefixtures("lineage_data")
@@ -23,6 +46,16 @@ class TestLineage:
         with pytest.raises(ValueError):
             Lineage(**lineage_data["bad"])
 
+    def test_interned(self, lineage_data):
+        lineage = Lineage(**lineage_data["good"])
+        assert Lineage(**lineage_data["good"]) is lineage
+        assert Lineage(**{**lineage_data["good"], "Order": " [O1] "}) is lineage
+        assert not hasattr(lineage, "__dict__")
+        with pytest.warns(RuntimeWarning):
+            Lineage(Kingdom="Bacteria", Class="C1")
+        with pytest.warns(RuntimeWarning):
+            Lineage(Kingdom="Bacteria", Class="C1")
+
     def test_sub(self, lineage_data):
         lineage1 = Lineage(**lineage_data["good"])
         lineage2 = Lineage(**{**lineage_data["good"], **{"Order": "O2"}})
@@ -52,6 +85,29 @@ class TestLineage:
         assert lineage1 == lineage2
         assert str(lineage1) == str(lineage2)
 
+    def test_from_str_many(self, lineage_data):
+        lineage1 = Lineage(**lineage_data["good"])
+        lineage_strs = pd.Series(
+            [
+                str(lineage1),
+                "p__Firmicutes; c__[Clostridia]; o__",
+                str(lineage1),
+                "k__Bacteria",
+            ],
+            index=["otu1", "otu2", "otu3", "otu4"],
+        )
+        lineages = Lineage.from_str_many(lineage_strs)
+        assert list(lineages.columns) == list(Lineage._fields)
+        assert list(lineages.index) == list(lineage_strs.index)
+        for otu, lineage_str in lineage_strs.items():
+            assert tuple(lineages.loc[otu]) == Lineage.from_str(lineage_str)
+        silva_strs = pd.Series([lineage1.to_str(style="silva", level="Genus")])
+        assert tuple(Lineage.from_str_many(silva_strs, style="silva").iloc[0]) == (
+            Lineage.from_str(silva_strs[0], style="silva")
+        )
+        with pytest.raises(ValueError):
+            Lineage.from_str_many(pd.Series(["Unassigned"]))
+
     def test_to_str(self, lineage_data):
         lineage1 = Lineage(**lineage_data["good"])
         assert (
@@ -91,3 +147,70 @@ class TestLineage:
         )
         with pytest.warns(RuntimeWarning):
             assert lineage3.taxid[1] == 561
+
+    @pytest.mark.filterwarnings("ignore::RuntimeWarning")
+    def test_resolve_taxids(self, lineage_data):
+        lineages = [
+            Lineage.from_str(
+                "k__Bacteria;p__Firmicutes;c__Clostridia;o__Clostridiales;f__Ruminococcaceae"
+            ),
+            Lineage.from_str(
+                "k__Bacteria;p__Proteobacteria;c__Gammaproteobacteria;o__Enterobacterales;f__Enterobacteriaceae;g__Escherichia;s__coli"
+            ),
+            Lineage.from_str(
+                "k__Bacteria;p__Proteobacteria;c__Gammaproteobacteria;o__Enterobacterales;f__Enterobacteriaceae;g__Escherichia;s__dragon"
+            ),
+        ]
+        taxids = Lineage.resolve_taxids(lineages + lineages[:1])
+        assert list(taxids) == lineages
+        assert [taxids[lineage][1] for lineage in lineages] == [541_000, 562, 561]
+        assert all(taxids[lineage] == lineage.taxid for lineage in lineages)
+        with pytest.warns(RuntimeWarning):
+            assert lineages[2].taxid[1] == 561
+
+    @pytest.mark.filterwarnings("ignore::RuntimeWarning")
+    def test_taxonomy_backend(self, lineage_data):
+        lineage = Lineage.from_str(
+            "k__Bacteria;p__Proteobacteria;c__Gammaproteobacteria;o__Enterobacterales;f__Enterobacteriaceae;g__Escherichia;s__dragon"
+        )
+        default_backend = get_taxonomy_backend()
+        assert lineage.taxid == ("Genus", 561)
+        set_taxonomy_backend(StubBackend())
+        try:
+            assert isinstance(get_taxonomy_backend(), StubBackend)
+            assert Lineage(Kingdom="Bacteria").taxid == ("Kingdom", 12908)
+            assert Lineage.from_taxid(561) == Lineage(Kingdom="Bacteria")
+        finally:
+            set_taxonomy_backend(None)
+        assert get_taxonomy_backend() is not default_backend
+
+
+class TestLineageTree:
+    """ Tests for the LineageTree class """
+
+    def test_queries(self, lineage_data):
+        lineage1 = Lineage(**lineage_data["good"])
+        lineage2 = Lineage(**{**lineage_data["good"], "Family": "F2"})
+        lineage3 = Lineage(Kingdom="Bacteria", Phylum="P2")
+        lineages = [lineage1, lineage2, lineage3, lineage1]
+        tree = LineageTree(lineages)
+        assert tree.find(lineage2) == tree.leaves[1]
+        assert tree.get_lineage(tree.find(lineage3)) == lineage3
+        common = tree.common_ancestor(tree.find(lineage1), tree.find(lineage2))
+        assert tree.get_lineage(common) == lineage1 - lineage2
+        assert tree.common_ancestor(tree.find(lineage1), tree.find(lineage3)) == (
+            tree.level_nodes[0, 0]
+        )
+        for level in Lineage._fields:
+            supersets = tree.get_supersets(tree.leaves, level)
+            assert [tree.get_lineage(node) for node in supersets] == [
+                lineage.get_superset(level) for lineage in lineages
+            ]
+        family = tree.get_superset(tree.find(lineage1), "Family")
+        assert list(tree.get_descendants(family)) == [0, 3]
+        assert list(tree.get_descendants(tree.level_nodes[0, 2])) == [0, 1, 3]
+        assert list(tree.get_descendants(0)) == [0, 1, 2, 3]
+        with pytest.raises(ValueError):
+            tree.get_superset(family, "Genus")
+        with pytest.raises(KeyError):
+            tree.find(Lineage(Kingdom="Archaea"))
@@ -3,12 +3,19 @@
 """
 
 import json
+import time
 
 import networkx as nx
+import numpy as np
 import pandas as pd
 import pytest
+from schematics.exceptions import ValidationError
 
 from mindpipe.main import Network
+from mindpipe.main.network import LinkArrays
+
+
+NETWORK_TIME_BUDGET = 5.0
 
 
 @pytest.mark.usefixtures("correlation_data", "correlation_files", "network_elist_files")
@@ -44,7 +51,13 @@ class TestNetwork:
             cmeta_file,
         ) in correlation_files["good"]:
             network = Network.load_data(
-                corr_file, meta_file, cmeta_file, obsmeta_file, pval_file, child_file
+                corr_file,
+                meta_file,
+                cmeta_file,
+                obsmeta_file,
+                pval_file,
+                child_file,
+                prefilter=False,
             )
             corr_data = pd.read_table(corr_file, index_col=0)
             with open(meta_file, "r") as fid:
@@ -55,6 +68,66 @@ class TestNetwork:
             assert len(network.filtered_links) <= len(network.links)
             assert all(key in network.metadata for key in meta_data)
 
+    def test_load_data_prefilter(self, correlation_files):
+        for (
+            corr_file,
+            pval_file,
+            meta_file,
+            child_file,
+            obsmeta_file,
+            cmeta_file,
+        ) in correlation_files["good"]:
+            network = Network.load_data(
+                corr_file,
+                meta_file,
+                cmeta_file,
+                obsmeta_file,
+                pval_file,
+                child_file,
+                prefilter=False,
+            )
+            network_prefilter = Network.load_data(
+                corr_file, meta_file, cmeta_file, obsmeta_file, pval_file, child_file
+            )
+            corr_data = pd.read_table(corr_file, index_col=0)
+            n_nodes = corr_data.shape[0]
+            assert (n_nodes ** 2 - n_nodes) // 2 == len(network.links)
+            assert network_prefilter.nodes == network.nodes
+            assert network_prefilter.links == network.filter_links(
+                pvalue_filter=False, interaction_filter=True
+            )
+            assert network_prefilter.metadata == network.metadata
+
+    def test_lazy_graph(self, correlation_files):
+        for (
+            corr_file,
+            pval_file,
+            meta_file,
+            child_file,
+            obsmeta_file,
+            cmeta_file,
+        ) in correlation_files["good"]:
+            network = Network.load_data(
+                corr_file, meta_file, cmeta_file, obsmeta_file, pval_file, child_file
+            )
+            assert network._graph is None
+            assert "links=" in repr(network) and network._graph is None
+            filtered_links = network.filter_links(
+                pvalue_filter=True, interaction_filter=True
+            )
+            assert filtered_links == [
+                link
+                for link in network.links
+                if abs(link["weight"]) >= network.interaction_threshold
+                and link["pvalue"] <= network.pvalue_threshold
+            ]
+            assert network._graph is None
+            graph = network.graph
+            assert network.graph is graph
+            assert [data for _, data in graph.nodes(data=True)] == network.nodes
+            assert [data for _, _, data in graph.edges(data=True)] == network.links
+            assert graph.graph is network.metadata
+
     def test_graph(self, correlation_data):
         for (
             corr_data,
@@ -148,3 +221,43 @@ class TestNetwork:
                 fun(x): (x["pvalue"], x["weight"]) for x in network_json.filtered_links
             }
             assert links1 == links2
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_init_scaling(monkeypatch):
+    """ Test that a large network is built from arrays without per-link records """
+    n_nodes = 400
+    nodes = [f"otu{ind}" for ind in range(n_nodes)]
+    obs_metadata = pd.DataFrame(
+        {"Kingdom": "Bacteria", "Phylum": [f"P{ind % 5}" for ind in range(n_nodes)]},
+        index=nodes,
+    )
+    source, target = np.triu_indices(n_nodes, 1)
+    rng = np.random.default_rng(0)
+    links = LinkArrays(
+        source=source.astype(np.int32),
+        target=target.astype(np.int32),
+        weight=rng.uniform(-1, 1, len(source)),
+        pvalue=rng.uniform(0, 1, len(source)),
+    )
+    metadata = {
+        "host": "human",
+        "condition": "healthy",
+        "location": "gut",
+        "experimental_metadata": {},
+        "publication": {"date": "2020-01-01", "authors": [], "pubmed_id": "1"},
+        "description": "scaling test",
+    }
+
+    def no_records(self):
+        raise AssertionError("Network links were converted to records")
+
+    monkeypatch.setattr(Network, "links", property(no_records))
+    start = time.perf_counter()
+    network = Network(nodes, links, metadata, {}, obs_metadata)
+    elapsed = time.perf_counter() - start
+    assert f"links={len(source)}" in repr(network)
+    assert elapsed < NETWORK_TIME_BUDGET
+    bad_links = links._replace(weight=np.full(len(source), np.inf))
+    with pytest.raises(ValidationError):
+        Network(nodes, bad_links, metadata, {}, obs_metadata, pvalue_correction=None)
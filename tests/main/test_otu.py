@@ -2,12 +2,31 @@
     Module containing tests for the Otu class
 """
 
+import gzip
+import time
+
+from biom import Table
 import numpy as np
 import pytest
+from scipy import sparse
 
 from mindpipe.main import Otu, Lineage
 
 
+# The minimum speedup of `rm_sparse_samples` over a per-sample `Table.filter`
+RM_SPARSE_SPEEDUP = 2.0
+
+
+def partition_summary(label, otu):
+    """ Summarize a partition (module level so that it can be pickled) """
+    return otu.otu_data.shape, list(otu.otu_data.ids()), otu.otu_data.sum()
+
+
+def partition_metadata(label, otu):
+    """ Get the metadata of a partition (module level so that it can be pickled) """
+    return otu.obs_metadata, otu.sample_metadata
+
+
 @pytest.mark.usefixtures("biom_data", "biom_files", "tsv_files", "stool_biom")
 class TestOtu:
     """ Tests for the Otu class """
@@ -17,6 +36,15 @@ class TestOtu:
             otu_inst = Otu(biom)
             assert (otu_inst.otu_data.to_dataframe() == biom.to_dataframe()).any().any()
 
+    def test_init_copy(self, stool_biom):
+        otu_copy = Otu(stool_biom)
+        assert otu_copy.otu_data is not stool_biom
+        table = stool_biom.copy()
+        assert Otu(table, copy=False).otu_data is table
+        otu_filtered = otu_copy.rm_sparse_samples()
+        assert otu_filtered.otu_data is not otu_copy.otu_data
+        assert otu_copy.otu_data.shape == stool_biom.shape
+
     def test_load_data_biom(self, biom_files):
         for biom in biom_files["good"]:
             otu_inst = Otu.load_data(biom)
@@ -24,6 +52,101 @@ class TestOtu:
             assert hasattr(otu_inst, "sample_metadata")
             assert hasattr(otu_inst, "obs_metadata")
 
+    def test_load_data_subset(self, biom_files, stool_biom):
+        biom_file = next(f for f in biom_files["good"] if f.name == "stool.biom")
+        sample_ids = Otu.load_ids(biom_file)
+        assert sample_ids == list(stool_biom.ids(axis="sample"))
+        subset = sample_ids[::3]
+        otu_inst = Otu.load_data(biom_file, subset=subset)
+        assert list(otu_inst.otu_data.ids(axis="sample")) == subset
+        expected = stool_biom.filter(subset, inplace=False)
+        expected.remove_empty(axis="observation")
+        assert (otu_inst.otu_data.matrix_data != expected.matrix_data).nnz == 0
+        assert otu_inst.obs_metadata.equals(Otu(expected).obs_metadata)
+        assert otu_inst.sample_metadata.equals(Otu(expected).sample_metadata)
+        obs_ids = Otu.load_ids(biom_file, axis="observation")[:10]
+        otu_obs = Otu.load_data(biom_file, subset=obs_ids, subset_axis="observation")
+        assert list(otu_obs.otu_data.ids(axis="observation")) == obs_ids
+        with pytest.raises(ValueError):
+            Otu.load_data(biom_file, subset=subset, subset_axis="taxa")
+
+    def test_npz_metadata(self, tmpdir):
+        sample_metadata = [
+            {"age": 1, "mix": 3, "tags": ["a", "b"], "site": "gut"},
+            {"age": None, "mix": "x", "tags": [], "site": "gut", "extra": 0.5},
+        ]
+        table = Table(
+            np.array([[1, 2], [3, 4]]),
+            ["otu1", "otu2"],
+            ["s1", "s2"],
+            observation_metadata=[
+                Lineage("Bacteria").to_dict("Kingdom"),
+                Lineage("Archaea").to_dict("Kingdom"),
+            ],
+            sample_metadata=sample_metadata,
+        )
+        otu_inst = Otu(table, validation_level="none")
+        fol = tmpdir.mkdir("results")
+        otu_inst.write("npz_metadata", str(fol), "npz")
+        otu_load = Otu.load_data(
+            fol.join("npz_metadata.npz"), dtype="npz", validation_level="none"
+        )
+        assert [dict(md) for md in otu_load.otu_data.metadata()] == sample_metadata
+        assert [dict(md) for md in otu_load.otu_data.metadata(axis="observation")] == [
+            dict(md) for md in table.metadata(axis="observation")
+        ]
+        assert type(otu_load.otu_data.metadata()[0]["age"]) is int
+        table.add_metadata({"s1": {"bad": object()}, "s2": {"bad": object()}})
+        with pytest.raises(ValueError):
+            Otu(table, validation_level="none").write("bad", str(fol), "npz")
+
+    def test_load_data_subset_formats(self, biom_files, stool_biom, tmpdir):
+        hdf5_file = next(f for f in biom_files["good"] if f.name == "stool.biom")
+        json_file = tmpdir.join("stool_json.biom")
+        json_file.write(stool_biom.to_json("mindpipe"))
+        npz_fol = tmpdir.mkdir("npz")
+        Otu(stool_biom).write("stool", str(npz_fol), "npz")
+        npz_file = npz_fol.join("stool.npz")
+        subset = list(stool_biom.ids(axis="sample"))[:5]
+        otu_hdf5 = Otu.load_data(hdf5_file, subset=subset)
+        assert otu_hdf5.otu_data.shape[0] < stool_biom.shape[0]
+        for otu_inst in [
+            Otu.load_data(json_file, subset=subset),
+            Otu.load_data(npz_file, dtype="npz", subset=subset),
+        ]:
+            for axis in ["sample", "observation"]:
+                assert list(otu_inst.otu_data.ids(axis=axis)) == list(
+                    otu_hdf5.otu_data.ids(axis=axis)
+                )
+            assert (
+                otu_inst.otu_data.matrix_data != otu_hdf5.otu_data.matrix_data
+            ).nnz == 0
+            assert otu_inst.sample_metadata.equals(otu_hdf5.sample_metadata)
+            assert otu_inst.obs_metadata.equals(otu_hdf5.obs_metadata)
+        for otu_file, dtype in [
+            (hdf5_file, "biom"),
+            (json_file, "biom"),
+            (npz_file, "npz"),
+        ]:
+            with pytest.raises(ValueError):
+                Otu.load_data(otu_file, dtype=dtype, subset=subset + ["missing"])
+
+    def test_validation_level(self, biom_files, stool_biom):
+        otu_inst = Otu(stool_biom)
+        assert "validate_obs_metadata" in otu_inst.validation_timings
+        otu_inst = Otu(stool_biom, validation_level="structural")
+        assert "validate_obs_metadata" not in otu_inst.validation_timings
+        assert Otu(stool_biom, validation_level="none").validation_timings == {}
+        for biom in biom_files["good"]:
+            otu_inst = Otu.load_data(biom, validation_level="structural")
+            assert set(otu_inst.validation_timings) == {
+                "validate_istable",
+                "validate_samples",
+                "validate_index",
+            }
+        with pytest.raises(ValueError):
+            Otu(stool_biom, validation_level="partial")
+
     def test_load_data_tsv(self, tsv_files):
         for otu, sample, tax in tsv_files["good"]:
             otu_inst = Otu.load_data(otu, sample, tax, dtype="tsv")
@@ -31,6 +154,20 @@ class TestOtu:
             assert hasattr(otu_inst, "sample_metadata")
             assert hasattr(otu_inst, "obs_metadata")
 
+    def test_metadata_cache(self, stool_biom):
+        otu_inst = Otu(stool_biom)
+        assert otu_inst.obs_metadata is otu_inst.obs_metadata
+        assert otu_inst.sample_metadata is otu_inst.sample_metadata
+        assert otu_inst.tax_level == "Genus"
+        assert otu_inst.obs_metadata.equals(
+            stool_biom.metadata_to_dataframe("observation")[list(Lineage._fields[:6])]
+        )
+        assert not otu_inst.is_norm(axis="sample")
+        otu_inst.otu_data = stool_biom.norm(axis="sample", inplace=False)
+        assert not otu_inst._metadata_cache and not otu_inst._norm_cache
+        assert otu_inst.is_norm(axis="sample")
+        assert otu_inst.tax_level == "Genus"
+
     def test_normalize(self, stool_biom):
         otu_inst = Otu(stool_biom)
         sample_norm = otu_inst.normalize()
@@ -43,10 +180,101 @@ class TestOtu:
         assert np.isclose(obs_norm.otu_data.to_dataframe().sum(axis=1), 1.0).all()
         with pytest.raises(ValueError):
             otu_inst.normalize(method="random_method")
-        with pytest.raises(NotImplementedError):
-            otu_inst.normalize(method="css")
-        with pytest.raises(NotImplementedError):
-            otu_inst.normalize(method="rarefy")
+
+    def test_normalize_css(self, stool_biom):
+        otu_inst = Otu(stool_biom)
+        css_otu = otu_inst.normalize(method="css")
+        assert css_otu.otu_data.shape == otu_inst.otu_data.shape
+        counts = otu_inst.otu_data.matrix_data.toarray()
+        expected = np.zeros_like(counts)
+        for i, sample in enumerate(counts.T):
+            quantile = np.quantile(sample[sample > 0], 0.5)
+            expected[:, i] = sample / sample[sample <= quantile].sum() * 1000
+        assert np.allclose(css_otu.otu_data.matrix_data.toarray(), expected)
+        css_otu = otu_inst.normalize(method="css", quantile=0.75)
+        for i, sample in enumerate(counts.T):
+            quantile = np.quantile(sample[sample > 0], 0.75)
+            expected[:, i] = sample / sample[sample <= quantile].sum() * 1000
+        assert np.allclose(css_otu.otu_data.matrix_data.toarray(), expected)
+        with pytest.raises(ValueError):
+            otu_inst.normalize(method="css", quantile=1.5)
+        with pytest.raises(ValueError):
+            otu_inst.normalize(axis="observation", method="css")
+
+    def test_normalize_rarefy(self, stool_biom):
+        otu_inst = Otu(stool_biom)
+        depth = 1000
+        rarefied = otu_inst.normalize(method="rarefy", depth=depth, seed=42)
+        sample_sums = otu_inst.otu_data.sum(axis="sample")
+        assert rarefied.otu_data.shape[0] == otu_inst.otu_data.shape[0]
+        assert rarefied.otu_data.shape[1] == (sample_sums >= depth).sum()
+        assert (rarefied.otu_data.sum(axis="sample") == depth).all()
+        original = otu_inst.otu_data.filter(
+            rarefied.otu_data.ids(), inplace=False
+        ).matrix_data
+        assert (rarefied.otu_data.matrix_data > original).nnz == 0
+        rarefied_parallel = otu_inst.normalize(
+            method="rarefy", depth=depth, seed=42, workers=2
+        )
+        assert (
+            rarefied.otu_data.matrix_data != rarefied_parallel.otu_data.matrix_data
+        ).nnz == 0
+        min_depth = otu_inst.normalize(method="rarefy", seed=42)
+        assert min_depth.otu_data.shape == otu_inst.otu_data.shape
+        assert (min_depth.otu_data.sum(axis="sample") == sample_sums.min()).all()
+        for bad_depth in [0, 10.5, int(sample_sums.max()) + 1]:
+            with pytest.raises(ValueError):
+                otu_inst.normalize(method="rarefy", depth=bad_depth)
+        with pytest.raises(ValueError):
+            otu_inst.normalize(axis="observation", method="rarefy")
+        with pytest.raises(ValueError):
+            otu_inst.normalize().normalize(method="rarefy")
+
+    def test_normalize_rarefy_empty_sample(self):
+        obs_ids, sample_ids = ["otu0", "otu1", "otu2"], ["s0", "s1", "s2"]
+        obs_metadata = [Lineage("Bacteria").to_dict("Kingdom") for _ in obs_ids]
+        sample_metadata = [{"group": "A"} for _ in sample_ids]
+        matrix = np.array([[5, 0, 0], [3, 2, 0], [0, 4, 0]])
+        table = Table(matrix, obs_ids, sample_ids, obs_metadata, sample_metadata)
+        otu_inst = Otu(table, copy=False, validation_level="none")
+        rarefied = otu_inst.normalize(method="rarefy", seed=42)
+        assert list(rarefied.otu_data.ids()) == ["s0", "s1"]
+        assert (rarefied.otu_data.sum(axis="sample") == 6).all()
+        empty_table = Table(
+            np.zeros((3, 3)), obs_ids, sample_ids, obs_metadata, sample_metadata
+        )
+        with pytest.raises(ValueError):
+            Otu(empty_table, validation_level="none").normalize(method="rarefy")
+
+    def test_transform(self, stool_biom):
+        otu_inst = Otu(stool_biom)
+        counts = otu_inst.otu_data.matrix_data.toarray() + 0.5
+        clr = otu_inst.transform(method="clr", pseudocount=0.5, block_size=50)
+        expected = np.log(counts) - np.log(counts).mean(axis=0)
+        assert clr.shape == otu_inst.otu_data.shape
+        assert clr.values.dtype == np.float32
+        assert np.allclose(clr.values, expected, atol=1e-5)
+        reference = otu_inst.otu_data.ids("observation")[3]
+        alr = otu_inst.transform(method="alr", pseudocount=0.5, reference=reference)
+        assert alr.shape[0] == otu_inst.otu_data.shape[0] - 1
+        assert reference not in alr.index
+        expected = np.log(np.delete(counts, 3, axis=0)) - np.log(counts[3])
+        assert np.allclose(alr.values, expected, atol=1e-5)
+        with pytest.raises(ValueError):
+            otu_inst.transform(method="ilr")
+        with pytest.raises(ValueError):
+            otu_inst.transform(method="alr", reference="missing_otu")
+
+    def test_is_norm(self, stool_biom):
+        otu_inst = Otu(stool_biom)
+        assert not otu_inst.is_norm(axis="sample")
+        assert not otu_inst.is_norm(axis="observation")
+        sample_norm = otu_inst.normalize()
+        assert sample_norm.is_norm(axis="sample")
+        assert not sample_norm.is_norm(axis="observation")
+        assert sample_norm._norm_cache == {"sample": True, "observation": False}
+        with pytest.raises(ValueError):
+            otu_inst.is_norm(axis="random_axis")
 
     def test_rm_sparse_samples(self, stool_biom):
         otu_inst = Otu(stool_biom)
@@ -58,12 +286,51 @@ class TestOtu:
         with pytest.raises(ValueError):
             norm_otu.rm_sparse_samples()
 
+    def test_rm_sparse_samples_large(self):
+        n_obs, n_samples = 50, 12_000
+        rng = np.random.default_rng(42)
+        matrix = sparse.random(
+            n_obs, n_samples, density=0.1, format="csr", random_state=rng
+        )
+        matrix.data = np.ceil(matrix.data * 100)
+        obs_ids = [f"otu{i}" for i in range(n_obs)]
+        sample_ids = [f"sample{i}" for i in range(n_samples)]
+        obs_metadata = [
+            Lineage("Bacteria", f"P{i % 5}").to_dict("Phylum") for i in range(n_obs)
+        ]
+        sample_metadata = [{"group": "A"} for _ in sample_ids]
+        table = Table(matrix, obs_ids, sample_ids, obs_metadata, sample_metadata)
+        otu_inst = Otu(table, copy=False)
+        count_thres = 250
+        start = time.perf_counter()
+        reference = table.filter(
+            lambda val, *_: round(val.sum()) >= count_thres,
+            axis="sample",
+            inplace=False,
+        )
+        reference_elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        rm_samples_otu = otu_inst.rm_sparse_samples(count_thres=count_thres)
+        elapsed = time.perf_counter() - start
+        depths = np.asarray(matrix.sum(axis=0)).ravel()
+        expected = [s for s, d in zip(sample_ids, depths) if round(d) >= count_thres]
+        assert list(rm_samples_otu.otu_data.ids()) == expected
+        assert list(reference.ids()) == expected
+        assert rm_samples_otu.otu_data.shape == (n_obs, len(expected))
+        assert list(rm_samples_otu.sample_metadata.columns) == ["group"]
+        assert elapsed * RM_SPARSE_SPEEDUP < reference_elapsed
+
     def test_rm_sparse_obs(self, stool_biom):
         otu_inst = Otu(stool_biom)
         rm_obs_otu = otu_inst.rm_sparse_obs(prevalence_thres=0.4)
         assert otu_inst.otu_data.shape[1] == rm_obs_otu.otu_data.shape[1]
         assert otu_inst.otu_data.shape[0] >= rm_obs_otu.otu_data.shape[0]
         assert otu_inst.otu_data.shape[0] - rm_obs_otu.otu_data.shape[0] == 10
+        assert rm_obs_otu.otu_data.ids("observation")[-1] == "otu_merged"
+        assert np.allclose(
+            rm_obs_otu.otu_data.sum(axis="sample"), otu_inst.otu_data.sum(axis="sample")
+        )
+        assert rm_obs_otu.obs_metadata.loc["otu_merged", "Kingdom"] == "Unclassified"
 
     def test_partition(self, stool_biom):
         otu_inst = Otu(stool_biom)
@@ -78,6 +345,29 @@ class TestOtu:
             == otu_inst.otu_data.shape[0]
         )
 
+    def test_map_partitions(self, stool_biom):
+        otu_inst = Otu(stool_biom)
+        func = lambda id_, md: md["Visit"]
+        serial = otu_inst.map_partitions("sample", func, partition_summary)
+        parallel = otu_inst.map_partitions("sample", func, partition_summary, workers=2)
+        assert serial == parallel
+        assert set(serial) == set(otu_inst.sample_metadata["Visit"])
+        assert sum(shape[1] for shape, *_ in serial.values()) == len(
+            otu_inst.otu_data.ids()
+        )
+        assert np.isclose(sum(total for *_, total in serial.values()), stool_biom.sum())
+        serial_md = otu_inst.map_partitions("sample", func, partition_metadata)
+        parallel_md = otu_inst.map_partitions(
+            "sample", func, partition_metadata, workers=2
+        )
+        sample_metadata = otu_inst.sample_metadata
+        for label, (obs_md, sample_md) in parallel_md.items():
+            assert obs_md.equals(serial_md[label][0])
+            assert sample_md.equals(serial_md[label][1])
+            assert obs_md.equals(otu_inst.obs_metadata)
+            expected = sample_metadata[sample_metadata["Visit"] == label]
+            assert sample_md.equals(expected)
+
     def test_filter(self, stool_biom):
         otu_inst = Otu(stool_biom)
         query = "Firmicutes"
@@ -96,11 +386,32 @@ class TestOtu:
         assert len(family_members) == otu_collapse.otu_data.shape[0]
         assert otu_inst.otu_data.shape[1] == otu_collapse.otu_data.shape[1]
         assert family_members == set(otu_collapse.obs_metadata.Family)
+        assert np.allclose(
+            otu_collapse.otu_data.sum(axis="sample"),
+            otu_inst.otu_data.sum(axis="sample"),
+        )
         group_dict = otu_inst.obs_metadata.groupby("Family").groups
         assert sorted(list(i) for i in group_dict.values()) == sorted(
             list(i) for i in children_map.values()
         )
 
+    def test_collapse_taxa_levels(self, stool_biom):
+        otu_inst = Otu(stool_biom)
+        levels = ["Phylum", "Family", "Genus"]
+        collapsed = otu_inst.collapse_taxa_levels(levels)
+        assert list(collapsed) == ["Genus", "Family", "Phylum"]
+        child_otu = otu_inst
+        for level in reversed(levels):
+            child_otu, children_map = child_otu.collapse_taxa(level)
+            otu_level, children_level = collapsed[level]
+            assert children_map == children_level
+            assert otu_level.tax_level == level
+            assert (
+                otu_level.otu_data.matrix_data != child_otu.otu_data.matrix_data
+            ).nnz == 0
+        with pytest.raises(ValueError):
+            otu_inst.collapse_taxa_levels(["Genus", "Strain"])
+
     def test_write(self, stool_biom, tmpdir):
         otu_inst = Otu(stool_biom)
         fol = tmpdir.mkdir("results")
@@ -115,3 +426,46 @@ class TestOtu:
             dtype="tsv",
         )
         assert otu_inst.otu_data.shape == otu_load2.otu_data.shape
+
+    def test_write_tsv_chunked(self, stool_biom, tmpdir):
+        otu_inst = Otu(stool_biom)
+        fol = tmpdir.mkdir("results")
+        expected = stool_biom.to_tsv().split("\n", 1)[-1] + "\n"
+        otu_inst.write("tsv_test", str(fol), "tsv", chunk_size=7)
+        with open(fol.join("tsv_test_otu.tsv")) as fid:
+            assert fid.read() == expected
+        otu_inst.write("gz_test", str(fol), "tsv", compress=True)
+        with gzip.open(fol.join("gz_test_otu.tsv.gz"), "rt") as fid:
+            assert fid.read() == expected
+
+    def test_write_npz(self, stool_biom, tmpdir):
+        otu_inst = Otu(stool_biom)
+        fol = tmpdir.mkdir("results")
+        otu_inst.write("npz_test", str(fol), "npz")
+        otu_load = Otu.load_data(fol.join("npz_test.npz"), dtype="npz")
+        assert (otu_load.otu_data.matrix_data != stool_biom.matrix_data).nnz == 0
+        assert list(otu_load.otu_data.ids()) == list(stool_biom.ids())
+        assert otu_load.sample_metadata.equals(otu_inst.sample_metadata)
+        assert otu_load.obs_metadata.equals(otu_inst.obs_metadata)
+        otu_collapsed, _ = otu_inst.collapse_taxa("Family")
+        otu_collapsed.write("npz_collapsed", str(fol), "npz")
+        otu_load = Otu.load_data(fol.join("npz_collapsed.npz"), dtype="npz")
+        assert otu_load.obs_metadata.equals(otu_collapsed.obs_metadata)
+        assert otu_load.tax_level == "Family"
+        assert otu_load.validation_level == "full"
+        assert otu_load.validation_timings == {}
+        otu_structural = Otu(stool_biom, validation_level="structural")
+        otu_structural.write("npz_structural", str(fol), "npz")
+        npz_structural = fol.join("npz_structural.npz")
+        otu_load = Otu.load_data(npz_structural, dtype="npz")
+        assert otu_load.validation_level == "full"
+        assert "validate_data" in otu_load.validation_timings
+        otu_load = Otu.load_data(
+            npz_structural, dtype="npz", validation_level="structural"
+        )
+        assert otu_load.validation_level == "structural"
+        assert otu_load.validation_timings == {}
+        with pytest.raises(ValueError):
+            Otu.load_data(npz_structural, dtype="npz", validation_level="partial")
+        with pytest.raises(ValueError):
+            otu_inst.write("bad_test", str(fol), "parquet")
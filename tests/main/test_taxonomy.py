@@ -0,0 +1,98 @@
+"""
+    Module containing tests for the TaxonomyIndex class
+"""
+
+import tarfile
+
+import pytest
+
+from mindpipe.main import Lineage
+from mindpipe.main.lineage import set_taxonomy_backend
+from mindpipe.main.taxonomy import TaxonomyIndex
+
+
+NODES = [
+    (1, 1, "no rank"),
+    (2, 1, "superkingdom"),
+    (1224, 2, "phylum"),
+    (1236, 1224, "class"),
+    (91347, 1236, "order"),
+    (543, 91347, "family"),
+    (561, 543, "genus"),
+    (562, 561, "species"),
+]
+NAMES = [
+    (1, "root", "scientific name"),
+    (2, "Bacteria", "scientific name"),
+    (2, "eubacteria", "genbank common name"),
+    (1224, "Proteobacteria", "scientific name"),
+    (1236, "Gammaproteobacteria", "scientific name"),
+    (91347, "Enterobacterales", "scientific name"),
+    (543, "Enterobacteriaceae", "scientific name"),
+    (561, "Escherichia", "scientific name"),
+    (562, "Escherichia coli", "scientific name"),
+    (562, "Bacillus coli", "synonym"),
+]
+
+
+@pytest.fixture(scope="module")
+def taxdump(tmpdir_factory):
+    """ Fixture that writes a small NCBI taxdump """
+    folder = tmpdir_factory.mktemp("taxdump")
+    with open(folder.join("nodes.dmp"), "w") as fid:
+        for taxid, parent, rank in NODES:
+            fid.write(f"{taxid}\t|\t{parent}\t|\t{rank}\t|\t\t|\n")
+    with open(folder.join("names.dmp"), "w") as fid:
+        for taxid, name, name_class in NAMES:
+            fid.write(f"{taxid}\t|\t{name}\t|\t\t|\t{name_class}\t|\n")
+    with open(folder.join("merged.dmp"), "w") as fid:
+        fid.write("12\t|\t562\t|\n")
+    return folder
+
+
+class TestTaxonomyIndex:
+    """ Tests for the TaxonomyIndex class """
+
+    def test_build(self, taxdump, tmpdir):
+        index = TaxonomyIndex.build(str(taxdump), str(tmpdir.join("index")))
+        assert index.get_name_translator(["escherichia", "Bacillus coli", "Q"]) == {
+            "escherichia": [561],
+            "Bacillus coli": [562],
+        }
+        assert index.get_lineage(562) == [1, 2, 1224, 1236, 91347, 543, 561, 562]
+        assert index.get_lineage(12) == index.get_lineage(562)
+        assert index.get_taxid_translator([2, 561, 7]) == {
+            2: "Bacteria",
+            561: "Escherichia",
+        }
+        assert index.get_rank([2, 562]) == {2: "superkingdom", 562: "species"}
+        with pytest.raises(ValueError):
+            index.get_lineage(7)
+
+    def test_build_archive(self, taxdump, tmpdir):
+        archive = str(tmpdir.join("taxdump.tar.gz"))
+        with tarfile.open(archive, "w:gz") as tar:
+            for name in ["nodes.dmp", "names.dmp"]:
+                tar.add(str(taxdump.join(name)), arcname=name)
+        TaxonomyIndex.build(archive, str(tmpdir.join("index")))
+        index = TaxonomyIndex(str(tmpdir.join("index")))
+        assert index.get_name_translator(["Escherichia coli"]) == {
+            "Escherichia coli": [562]
+        }
+        with pytest.raises(ValueError):
+            index.get_lineage(12)
+
+    @pytest.mark.filterwarnings("ignore::RuntimeWarning")
+    def test_lineage_backend(self, taxdump, tmpdir):
+        index = TaxonomyIndex.build(str(taxdump), str(tmpdir.join("index")))
+        set_taxonomy_backend(index)
+        try:
+            lineage = Lineage.from_str(
+                "k__Bacteria;p__Proteobacteria;c__Gammaproteobacteria;o__Enterobacterales;f__Enterobacteriaceae;g__Escherichia;s__coli"
+            )
+            assert lineage.taxid == ("Species", 562)
+            assert Lineage.from_taxid(562) == Lineage(
+                *lineage[:-1], Species="Escherichia coli"
+            )
+        finally:
+            set_taxonomy_backend(None)
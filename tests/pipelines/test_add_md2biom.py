@@ -0,0 +1,44 @@
+"""
+    Module containing tests for the add_md2biom process script
+"""
+
+import importlib.util
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ..conftest import PIPELINE_DIR
+
+
+def load_script():
+    script = PIPELINE_DIR / "tax_assignment/assign/blast/processes/add_md2biom.py"
+    spec = importlib.util.spec_from_file_location("add_md2biom", str(script))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestTaxSplitter:
+    """ Tests for the tax_splitter function """
+
+    def test_tax_splitter(self):
+        add_md2biom = load_script()
+        taxa = pd.Series(
+            [
+                "k__Bacteria; p__[Firmicutes]",
+                "k__Bacteria",
+                "k__Bacteria; p__[Firmicutes]",
+            ],
+            index=["otu1", "otu2", "otu3"],
+        )
+        tax_data = add_md2biom.tax_splitter(taxa)
+        assert list(tax_data.columns) == add_md2biom.HEADERS
+        assert list(tax_data.index) == list(taxa.index)
+        assert list(tax_data.loc["otu1"]) == ["Bacteria", "Firmicutes"] + [""] * 5
+        assert list(tax_data.loc["otu2"]) == ["Bacteria"] + [""] * 6
+        with pytest.raises(ValueError):
+            add_md2biom.tax_splitter(pd.Series(["k__Bacteria", np.nan]))
+        eight_levels = ";".join(f"l{ind}__T{ind}" for ind in range(8))
+        with pytest.raises(ValueError):
+            add_md2biom.tax_splitter(pd.Series([eight_levels]))
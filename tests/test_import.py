@@ -0,0 +1,28 @@
+"""
+    Tests for the import time of the `mindpipe` package
+
+    These are kept apart from `test_mindpipe` so that they do not depend on the cli
+"""
+
+import subprocess
+import sys
+
+
+IMPORT_TIME_BUDGET = 2.0
+
+
+def test_import_time():
+    """Test that importing mindpipe stays fast and does not load heavy backends."""
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import mindpipe\n"
+        "print(time.perf_counter() - start)\n"
+        "print('ete3' in sys.modules, 'statsmodels' in sys.modules)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], stdout=subprocess.PIPE, check=True
+    )
+    elapsed, loaded = result.stdout.decode().splitlines()
+    assert loaded == "False False"
+    assert float(elapsed) < IMPORT_TIME_BUDGET
@@ -5,6 +5,7 @@
 import json
 
 from biom import load_table
+import numpy as np
 import pandas as pd
 import pytest
 from schematics.exceptions import DataError, ValidationError
@@ -18,8 +19,11 @@ from mindpipe.validation import (
     ChildrenmapType,
     NodesModel,
     LinksModel,
+    NodetableType,
+    LinkarraysType,
     NetworkmetadataModel,
 )
+from mindpipe.main.network import LinkArrays
 
 
 @pytest.mark.usefixtures("biom_files")
@@ -41,6 +45,49 @@ class TestBiomType:
                 with pytest.raises(ValidationError):
                     assert biom_type.validate(load_table(bad_biom))
 
+    def test_data_range(self, biom_files):
+        good_biom = load_table(biom_files["good"][0])
+        norm_biom = good_biom.norm(axis="sample", inplace=False)
+        assert BiomType(norm=True).validate(norm_biom)
+        with pytest.raises(ValidationError):
+            BiomType(norm=True).validate(good_biom)
+        neg_biom = good_biom.copy()
+        neg_biom.transform(lambda data, *_: -data, inplace=True)
+        with pytest.raises(ValidationError):
+            BiomType().validate(neg_biom)
+
+    def test_levels(self, biom_files):
+        good_biom = load_table(biom_files["good"][0])
+        biom_type = BiomType()
+        assert biom_type.validate(good_biom)
+        assert set(biom_type.timings) == set(BiomType.levels["full"])
+        structural_type = BiomType(level="structural")
+        assert structural_type.validate(good_biom)
+        assert set(structural_type.timings) == set(BiomType.levels["structural"])
+        assert BiomType(level="none").validate("not a table") == "not a table"
+        with pytest.raises(ValidationError):
+            structural_type.validate("not a table")
+        with pytest.raises(ValueError):
+            BiomType(level="partial")
+
+    def test_taxa_names(self, biom_files):
+        good_biom = load_table(biom_files["good"][0])
+        biom_type = BiomType()
+        assert biom_type.validate(good_biom)
+        assert biom_type.taxa_report == {}
+        obs_metadata = good_biom.metadata_to_dataframe("observation")
+        obs_metadata.iloc[0, 1] = "Bad|name"
+        obs_metadata.iloc[1, 1] = "Bad|name"
+        obs_metadata.iloc[2, 5] = "trailing "
+        obsmeta_type = ObsmetaType()
+        obsmeta_type.validate(obs_metadata)
+        assert obsmeta_type.report == {
+            obs_metadata.columns[1]: ["Bad|name"],
+            obs_metadata.columns[5]: ["trailing "],
+        }
+        with pytest.raises(ValidationError):
+            ObsmetaType(strict=True).validate(obs_metadata)
+
 
 @pytest.mark.usefixtures("correlation_files")
 class TestInteractionType:
@@ -118,6 +165,47 @@ class TestNetworkType:
                 bad_links_model = LinksModel({"links": bad_links}, strict=False)
                 bad_links_model.validate()
 
+    def test_node_table(self, raw_network_data):
+        nodetable_type = NodetableType()
+        for good_data in raw_network_data["good"]:
+            node_table = pd.DataFrame(
+                good_data["nodes"], columns=NodetableType.columns, dtype=object
+            )
+            nodetable_type.validate(node_table)
+            for column, value in [
+                ("id", "a"),
+                ("taxid", "x"),
+                ("taxlevel", "Strain"),
+                ("abundance", "high"),
+                ("children", "child"),
+            ]:
+                bad_table = node_table.copy()
+                bad_table.iat[0, bad_table.columns.get_loc(column)] = value
+                with pytest.raises(ValidationError):
+                    nodetable_type.validate(bad_table)
+
+    def test_link_arrays(self, raw_network_data):
+        for good_data in raw_network_data["good"]:
+            node_inds = {node["id"]: ind for ind, node in enumerate(good_data["nodes"])}
+            link_data = pd.DataFrame(good_data["links"])
+            links = LinkArrays(
+                source=link_data["source"].map(node_inds).values,
+                target=link_data["target"].map(node_inds).values,
+                weight=link_data["weight"].values.astype(float),
+                pvalue=link_data["pvalue"].values.astype(float),
+            )
+            linkarrays_type = LinkarraysType(n_nodes=len(node_inds))
+            linkarrays_type.validate(links)
+            n_links = len(links.source)
+            for bad_links in [
+                links._replace(source=np.full(n_links, len(node_inds))),
+                links._replace(weight=np.full(n_links, np.nan)),
+                links._replace(pvalue=np.full(n_links, 1.5)),
+                links._replace(target=links.target[:-1]),
+            ]:
+                with pytest.raises(ValidationError):
+                    linkarrays_type.validate(bad_links)
+
     def test_networkmetadata(self, raw_network_data):
         for good_data in raw_network_data["good"]:
             good_metadata = {